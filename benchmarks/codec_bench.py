@@ -0,0 +1,125 @@
+"""Benchmark for the JSON codecs. Encodes and decodes realistic faith, quiz and responses
+data with every installed library, indented and compact, and prints the timings and the
+resulting file sizes.
+
+Usage: python -m benchmarks.codec_bench [--repeat N] [--output result.json]"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import random
+import string
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.codec_tools import JsonCodec, dumps, loads
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(count))
+
+
+def generate_faith(rng: random.Random, members: int = 5_000) -> dict[str, int]:
+    """Member ids mapped to their faith points."""
+
+    return {str(rng.randint(10**17, 10**18)): rng.randint(-50, 25_000) for _ in range(members)}
+
+
+def generate_quiz(rng: random.Random, questions: int = 5_000) -> list[dict[str, Any]]:
+    """Questions in the format of quiz.json."""
+
+    return [
+        {
+            "question": _words(rng, rng.randint(6, 16)) + "?",
+            "category": _words(rng, 1).title(),
+            "range": sorted(rng.sample([50, 500, 4000, 32000, 250000, 1000000], 2)),
+            "answers": [{"text": _words(rng, rng.randint(1, 4)), "correct": i == 0} for i in range(4)],
+        }
+        for _ in range(questions)
+    ]
+
+
+def generate_responses(rng: random.Random, triggers: int = 500) -> dict[str, Any]:
+    """Requests and responses in the format of responses.json."""
+
+    return {
+        "req": {
+            _words(rng, 1): {"res": [_words(rng, rng.randint(3, 12))], "log": "{message.author.name} " + _words(rng, 3)}
+            for _ in range(triggers // 5)
+        },
+        "res": {
+            rf"(?i)\b{_words(rng, 1)}\b": {
+                "res": [_words(rng, rng.randint(3, 12)) for _ in range(rng.randint(1, 3))],
+                "log": "{message.author.name} " + _words(rng, 3),
+            }
+            for _ in range(triggers)
+        },
+    }
+
+
+def installed_codecs() -> list[JsonCodec]:
+    return [
+        codec for codec in JsonCodec if codec is JsonCodec.STDLIB or importlib.util.find_spec(codec.value) is not None
+    ]
+
+
+def measure(data: Any, codec: JsonCodec, indent: int | None, repeat: int) -> dict[str, float | int]:  # noqa: ANN401
+    """Returns the best encode and decode time in milliseconds and the size in bytes."""
+
+    encode_times = []
+    decode_times = []
+    text = ""
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = dumps(data, indent=indent, codec=codec)
+        encode_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loads(text, codec=codec)
+        decode_times.append(time.perf_counter() - start)
+
+    return {
+        "encode_ms": round(min(encode_times) * 1000, 3),
+        "decode_ms": round(min(decode_times) * 1000, 3),
+        "size_bytes": len(text.encode("utf-8")),
+    }
+
+
+def run(repeat: int = 5, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)  # noqa: S311
+    datasets = {"faith": generate_faith(rng), "quiz": generate_quiz(rng), "responses": generate_responses(rng)}
+
+    return [
+        {"dataset": name, "codec": codec.value, "format": "indent" if indent else "compact"}
+        | measure(data, codec, indent, repeat)
+        for name, data in datasets.items()
+        for codec in installed_codecs()
+        for indent in (4, None)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    print(f"{'dataset':12}{'codec':10}{'format':10}{'encode ms':>12}{'decode ms':>12}{'size kB':>12}")  # noqa: T201
+    for row in results:
+        print(  # noqa: T201
+            f"{row['dataset']:12}{row['codec']:10}{row['format']:10}"
+            f"{row['encode_ms']:>12.3f}{row['decode_ms']:>12.3f}{row['size_bytes'] / 1024:>12.1f}"
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Generator for large versions of every data file, to test how the bot scales beyond the
+current sizes. At scale 1 it writes faith.json with 100k members, squads.json with 500
+channels, responses.json with 5000 regex triggers, quiz.json with 100k questions,
+channel_messages.txt with 2 million sentences and three log files of 10 MB each. Every
+size is multiplied by the scale, the content is derived from the seed.
+
+The files are written into the output directory in the layout the bot expects, together
+with the small fixtures of the replay benchmark. The member ids are the ones of a
+FakeGuild with the same number of members, so the bot finds the members of the data.
+
+Usage: python -m benchmarks.datasets [--scale 1.0] [--members 200] --output /tmp/moevius-large"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FULL_SIZES = {
+    "faith": 100_000,
+    "squads": 500,
+    "responses": 5_000,
+    "quiz": 100_000,
+    "channel_messages": 2_000_000,
+    "log_bytes": 10 * 1024 * 1024,
+}
+FAITH_DAYS = 30
+LOG_FILES = 3
+VOCABULARY_SIZE = 5_000
+WRITE_CHUNK = 10_000
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.codec_bench import generate_faith, generate_quiz, generate_responses  # noqa: E402
+from benchmarks.fakes import FakeGuild  # noqa: E402
+from benchmarks.replay import GAME_CHANNELS, TRIGGERS, WORDS, write_fixtures  # noqa: E402
+from tools.logger_tools import CustomFormatter  # noqa: E402
+from tools.storage_tools import DEFAULT_DB_PATH, StorageBackend, get_storage_backend, import_json_files  # noqa: E402
+
+
+def scaled_sizes(scale: float) -> dict[str, int]:
+    return {name: max(1, round(size * scale)) for name, size in FULL_SIZES.items()}
+
+
+def generate_faith_daily(rng: random.Random, members: list[str], days: int = FAITH_DAYS) -> dict[str, dict[str, int]]:
+    """Points per day and member in the format of faith_daily.json, a twentieth of the
+    members is active per day."""
+
+    today = dt.datetime.now(tz=dt.UTC).date()
+    active = max(1, len(members) // 20)
+
+    return {
+        (today - dt.timedelta(days=day)).isoformat(): {
+            member: rng.randint(1, 50) for member in rng.sample(members, min(active, len(members)))
+        }
+        for day in range(days)
+    }
+
+
+def generate_squads(rng: random.Random, channels: int, guild: FakeGuild) -> dict[str, dict[str, str]]:
+    """Squads of up to twelve members per game channel in the format of squads.json."""
+
+    names = [*GAME_CHANNELS, *(f"game{index}" for index in range(max(channels - len(GAME_CHANNELS), 0)))]
+
+    return {
+        name: {member["username"]: member["id"] for member in rng.sample(guild.members, rng.randint(0, 12))}
+        for name in names[:channels]
+    }
+
+
+def generate_quiz_ranking(rng: random.Random, guild: FakeGuild) -> dict[str, dict[str, Any]]:
+    return {
+        member["id"]: {"name": member["username"], "points": rng.randint(0, 1_000_000), "tries": rng.randint(1, 50)}
+        for member in guild.members
+    }
+
+
+def write_channel_messages(path: Path, rng: random.Random, sentences: int) -> None:
+    """Writes the quoted person and the sentences for the markov model. The words follow
+    a Zipf distribution like chat messages, so the model gets frequent and rare words."""
+
+    vocabulary = [*WORDS, *(f"wort{index}" for index in range(VOCABULARY_SIZE - len(WORDS)))]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    cumulative = list(itertools.accumulate(weights))
+
+    with path.open("w", encoding="utf-8") as file:
+        file.write("Mövius\n")
+
+        for start in range(0, sentences, WRITE_CHUNK):
+            file.writelines(
+                " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(4, 20))) + "\n"
+                for _ in range(min(WRITE_CHUNK, sentences - start))
+            )
+
+
+def write_log(path: Path, rng: random.Random, size: int, day: dt.date) -> None:
+    """Writes log lines in the format of the bot's file handler until the file has size bytes."""
+
+    formatter = CustomFormatter()
+    messages = (
+        (logging.INFO, "%s hat %s 🕊 bekommen.", lambda: (f"member{rng.randrange(1000)}", rng.randint(1, 20))),
+        (logging.INFO, "Faith page %s displayed.", lambda: (rng.randint(1, 20),)),
+        (logging.DEBUG, "DictFile json/faith.json flushed.", tuple),
+        (logging.DEBUG, "Response triggered: %s", lambda: (rng.choice(WORDS),)),
+        (logging.ERROR, "%s - !squad - The check functions for command squad failed.", lambda: (rng.choice(WORDS),)),
+        (
+            logging.WARNING,
+            "Event loop lagged %s ms, the blocking function wasn't caught.",
+            lambda: (rng.randint(250, 900),),
+        ),
+    )
+    created = dt.datetime.combine(day, dt.time(), tzinfo=dt.UTC).timestamp()
+    written = 0
+
+    with path.open("w", encoding="utf-8") as file:
+        while written < size:
+            lines = []
+
+            for _ in range(1000):
+                level, message, args = rng.choice(messages)
+                record = logging.LogRecord("moevius", level, "cogs/faith.py", 1, message, args(), None, func="add")
+                created += rng.expovariate(0.5)
+                record.created = created
+                lines.append(formatter.format(record) + "\n")
+
+            written += file.write("".join(lines))
+
+
+def write_dataset(scale: float, guild: FakeGuild, seed: int = 0) -> dict[str, int]:
+    """Writes every data file at the given scale into the working directory.
+
+    Returns:
+        dict[str, int]: Size of each written file in bytes."""
+
+    rng = random.Random(seed)  # noqa: S311
+    sizes = scaled_sizes(scale)
+    members = [member["id"] for member in guild.members]
+
+    write_fixtures(len(guild.members), 0, seed)
+
+    faith = generate_faith(rng, max(sizes["faith"] - len(members), 0))
+    faith.update({member: rng.randint(-50, 25_000) for member in members})
+    responses = generate_responses(rng, sizes["responses"])
+    responses["res"].update({key: {"res": [text], "log": "Trigger"} for key, text in TRIGGERS.items()})
+
+    files = {
+        "json/faith.json": faith,
+        "json/faith_daily.json": generate_faith_daily(rng, list(faith)),
+        "json/squads.json": generate_squads(rng, sizes["squads"], guild),
+        "json/responses.json": responses,
+        "json/quiz.json": generate_quiz(rng, sizes["quiz"]),
+        "json/quiz_ranking.json": generate_quiz_ranking(rng, guild),
+    }
+
+    for name, content in files.items():
+        Path(name).write_text(json.dumps(content), encoding="utf-8")
+
+    write_channel_messages(Path("channel_messages.txt"), rng, sizes["channel_messages"])
+
+    today = dt.datetime.now(tz=dt.UTC).date()
+
+    for day in range(LOG_FILES):
+        date = today - dt.timedelta(days=day)
+        name = "logs/moevius.log" if day == 0 else f"logs/moevius.log.{date.strftime('%Y_%m_%d')}"
+        write_log(Path(name), rng, sizes["log_bytes"], date)
+
+    if get_storage_backend() is StorageBackend.SQLITE:
+        import_json_files(db_path=os.getenv("STORAGE_PATH", DEFAULT_DB_PATH), overwrite=True)
+
+    paths = [*files, "channel_messages.txt", *(str(path) for path in Path("logs").glob("moevius.log*"))]
+    return {path: Path(path).stat().st_size for path in paths}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--members", type=int, default=200, help="members of the fake guild")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    os.chdir(args.output)
+
+    for path, size in write_dataset(args.scale, FakeGuild(args.members, GAME_CHANNELS), args.seed).items():
+        print(f"{path:<36}{size / 1024 / 1024:>10.1f} MB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
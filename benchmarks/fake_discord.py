@@ -0,0 +1,501 @@
+"""A local stand-in for the Discord API for end-to-end load tests. It serves the part of the
+REST API and the gateway the bot uses (identify, heartbeat, resume, messages, reactions,
+history, app command sync) for a fake guild and plays a stream of events over the gateway,
+so the whole stack including discord.py's HTTP client and its rate limit handling can be
+tested without network access.
+
+Every REST request can be delayed, every bucket has a rate limit with Discord's headers and
+random requests can be answered with 429, to see how the bot copes with a slow API.
+
+With --fixtures the data files for the bot and an .env-file with a fake token are written
+into a directory, the bot has to be started there. The cogs for Twitch and the shorts talk
+to other services than Discord, without network access they only log errors.
+
+Usage:
+    python -m benchmarks.fake_discord --fixtures /tmp/moevius --events 10000 --rate 50
+    cd /tmp/moevius && python /path/to/main.py --api-base http://127.0.0.1:8080"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from enum import IntEnum
+from pathlib import Path
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PORT = 8080
+HEARTBEAT_INTERVAL_MS = 41250
+BUCKET_LIMIT = 5
+BUCKET_WINDOW = 5.0
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fakes import BOT_ID, GUILD_ID, FakeGuild  # noqa: E402
+from benchmarks.replay import GAME_CHANNELS, generate_events, percentile, write_fixtures  # noqa: E402
+
+
+def json_response(data: Any, status: int = 200, headers: dict[str, str] | None = None) -> web.Response:  # noqa: ANN401
+    """Like aiohttp's json_response, but without a charset in the content type, because
+    discord.py only decodes responses with exactly application/json."""
+
+    return web.Response(
+        body=json.dumps(data).encode(), status=status, headers={**(headers or {}), "Content-Type": "application/json"}
+    )
+
+
+class Opcode(IntEnum):
+    DISPATCH = 0
+    HEARTBEAT = 1
+    IDENTIFY = 2
+    RESUME = 6
+    REQUEST_MEMBERS = 8
+    HELLO = 10
+    HEARTBEAT_ACK = 11
+
+
+class GatewaySession:
+    """One connection of a client to the fake gateway."""
+
+    def __init__(self, ws: web.WebSocketResponse, *, compress: bool) -> None:
+        self.ws = ws
+        self.sequence = 0
+        self.session_id = os.urandom(16).hex()
+        self._compressor = zlib.compressobj() if compress else None
+
+    async def send(self, payload: dict[str, Any]) -> None:
+        data = json.dumps(payload)
+
+        if self._compressor is None:
+            await self.ws.send_str(data)
+            return
+
+        compressed = self._compressor.compress(data.encode()) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        await self.ws.send_bytes(compressed)
+
+    async def dispatch(self, name: str, data: dict[str, Any]) -> None:
+        self.sequence += 1
+        await self.send({"op": Opcode.DISPATCH, "t": name, "s": self.sequence, "d": data})
+
+
+class Bucket:
+    """Rate limit of a route, like one of Discord's buckets: limit requests per window,
+    the window starts with the first request and resets completely."""
+
+    def __init__(self, route: str, limit: int, window: float) -> None:
+        # Like Discord, the hash names the route. The major parameter only separates the buckets.
+        self.hash = hashlib.md5(route.encode(), usedforsecurity=False).hexdigest()
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset_at = 0.0
+
+    def hit(self) -> float:
+        """Counts a request.
+
+        Returns:
+            float: Seconds until the request would have been allowed, 0 if it is."""
+
+        if (now := time.monotonic()) >= self.reset_at:
+            self.used = 0
+            self.reset_at = now + self.window
+
+        if self.used >= self.limit:
+            return self.reset_at - now
+
+        self.used += 1
+        return 0.0
+
+    def headers(self) -> dict[str, str]:
+        reset_after = max(self.reset_at - time.monotonic(), 0.0)
+
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - self.used),
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": self.hash,
+        }
+
+
+class FakeDiscord:
+    """Serves the fake guild over REST and the gateway and counts what the bot does."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        guild: FakeGuild,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bucket_limit: int = BUCKET_LIMIT,
+        bucket_window: float = BUCKET_WINDOW,
+        rate_limit_chance: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self.guild = guild
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.base_url = ""
+        self.sessions: set[GatewaySession] = set()
+        self.connected = asyncio.Event()
+        self.requests: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+        self.dispatched: Counter[str] = Counter()
+        self.reply_seconds: list[float] = []
+        self._buckets: dict[str, Bucket] = {}
+        self._commands: defaultdict[str, deque[float]] = defaultdict(deque)
+        self._command_ids = itertools.count(BOT_ID + 1)
+        self._rng = random.Random(seed)  # noqa: S311
+
+    def application(self) -> web.Application:
+        app = web.Application(middlewares=[self.rate_limit])
+        app.add_routes(
+            [
+                web.get("/gateway", self.gateway),
+                web.get("/api/v10/gateway", self.get_gateway),
+                web.get("/api/v10/gateway/bot", self.get_gateway),
+                web.get("/api/v10/users/@me", self.get_user),
+                web.get("/api/v10/oauth2/applications/@me", self.get_application),
+                web.put("/api/v10/applications/{application_id}/commands", self.sync_commands),
+                web.put("/api/v10/applications/{application_id}/guilds/{guild_id}/commands", self.sync_commands),
+                web.post("/api/v10/channels/{channel_id}/messages", self.send_message),
+                web.get("/api/v10/channels/{channel_id}/messages", self.get_history),
+                web.get("/api/v10/channels/{channel_id}/messages/{message_id}", self.get_message),
+                web.patch("/api/v10/channels/{channel_id}/messages/{message_id}", self.edit_message),
+                web.delete("/api/v10/channels/{channel_id}/messages/{message_id}", self.no_content),
+                web.put("/api/v10/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self.no_content),
+                web.delete(
+                    "/api/v10/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self.no_content
+                ),
+                web.post("/api/v10/channels/{channel_id}/typing", self.no_content),
+            ]
+        )
+        return app
+
+    @web.middleware
+    async def rate_limit(self, request: web.Request, handler: Any) -> web.StreamResponse:  # noqa: ANN401
+        """Delays REST requests and answers them with 429, if their bucket is exhausted or by chance."""
+
+        if request.path == "/gateway":
+            return await handler(request)
+
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        route_name = f"{request.method} {route.removeprefix('/api/v10')}"
+        major = request.match_info.get("channel_id") or request.match_info.get("guild_id") or ""
+        self.requests[route_name] += 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._rng.uniform(0.0, self.jitter))
+
+        if (bucket := self._buckets.get(f"{route_name}:{major}")) is None:
+            bucket = self._buckets[f"{route_name}:{major}"] = Bucket(route_name, self.bucket_limit, self.bucket_window)
+        retry_after = bucket.hit()
+
+        if not retry_after and self._rng.random() < self.rate_limit_chance:
+            retry_after = self.retry_after
+
+        if retry_after:
+            self.rate_limited[route_name] += 1
+            return json_response(
+                {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": False},
+                status=429,
+                headers={**bucket.headers(), "X-RateLimit-Scope": "user", "Via": "1.1 google"},
+            )
+
+        response = await handler(request)
+        response.headers.update(bucket.headers())
+        return response
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        session = GatewaySession(ws, compress="compress" in request.query)
+        await session.send({"op": Opcode.HELLO, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL_MS}})
+
+        async for message in ws:
+            if message.type is not WSMsgType.TEXT:
+                continue
+
+            payload = json.loads(message.data)
+
+            match payload["op"]:
+                case Opcode.HEARTBEAT:
+                    await session.send({"op": Opcode.HEARTBEAT_ACK, "d": None})
+                case Opcode.IDENTIFY:
+                    await self.identify(session)
+                case Opcode.RESUME:
+                    session.session_id = payload["d"]["session_id"]
+                    self.sessions.add(session)
+                    await session.dispatch("RESUMED", {})
+                case Opcode.REQUEST_MEMBERS:
+                    members = [self.guild.member_payload(user) for user in (self.guild.bot_user, *self.guild.members)]
+                    await session.dispatch(
+                        "GUILD_MEMBERS_CHUNK",
+                        {"guild_id": str(GUILD_ID), "members": members, "chunk_index": 0, "chunk_count": 1},
+                    )
+
+        self.sessions.discard(session)
+        logging.info("Gateway session %s closed.", session.session_id)
+        return ws
+
+    async def identify(self, session: GatewaySession) -> None:
+        await session.dispatch(
+            "READY",
+            {
+                "v": 10,
+                "user": self.guild.bot_user,
+                "guilds": [{"id": str(GUILD_ID), "unavailable": True}],
+                "session_id": session.session_id,
+                "resume_gateway_url": f"{self.base_url.replace('http', 'ws', 1)}/gateway",
+                "application": {"id": str(BOT_ID), "flags": 0},
+                "shard": [0, 1],
+            },
+        )
+        await session.dispatch("GUILD_CREATE", self.guild.guild_payload())
+
+        self.sessions.add(session)
+        self.connected.set()
+        logging.info("Gateway session %s identified.", session.session_id)
+
+    async def dispatch(self, name: str, data: dict[str, Any]) -> None:
+        """Sends a gateway event to every connected client."""
+
+        self.dispatched[name] += 1
+
+        for session in list(self.sessions):
+            with contextlib.suppress(ConnectionError):
+                await session.dispatch(name, data)
+
+    async def play(self, events: list[dict[str, Any]], rate: float) -> float:
+        """Plays the events over the gateway, rate events per second.
+
+        Returns:
+            float: Seconds it took."""
+
+        start = time.perf_counter()
+
+        for index, event in enumerate(events):
+            name, payload = self.guild.event_payload(event)
+
+            if event["type"] == "command":
+                self._commands[payload["channel_id"]].append(time.perf_counter())
+
+            await self.dispatch(name, payload)
+
+            if rate and (delay := start + (index + 1) / rate - time.perf_counter()) > 0:
+                await asyncio.sleep(delay)
+
+        return time.perf_counter() - start
+
+    async def get_gateway(self, _: web.Request) -> web.Response:
+        return json_response(
+            {
+                "url": f"{self.base_url.replace('http', 'ws', 1)}/gateway",
+                "shards": 1,
+                "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+            }
+        )
+
+    async def get_user(self, _: web.Request) -> web.Response:
+        return json_response(self.guild.bot_user)
+
+    async def get_application(self, _: web.Request) -> web.Response:
+        return json_response(
+            {
+                "id": str(BOT_ID),
+                "name": self.guild.bot_user["username"],
+                "description": "",
+                "icon": None,
+                "bot_public": False,
+                "bot_require_code_grant": False,
+                "owner": self.guild.members[0],
+                "verify_key": "",
+                "flags": 0,
+            }
+        )
+
+    async def sync_commands(self, request: web.Request) -> web.Response:
+        commands = await request.json()
+
+        for command in commands:
+            command.setdefault("id", str(next(self._command_ids)))
+            command.update(application_id=request.match_info["application_id"], version="1")
+
+        return json_response(commands)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+
+        if request.content_type == "application/json":
+            payload = await request.json()
+        else:
+            form = await request.post()
+            payload = json.loads(str(form.get("payload_json", "{}")))
+
+        if self._commands[channel_id]:
+            self.reply_seconds.append(time.perf_counter() - self._commands[channel_id].popleft())
+
+        message = self.guild.message_payload(
+            channel_id, self.guild.bot_user, payload.get("content") or "", payload.get("embeds")
+        )
+        await self.dispatch("MESSAGE_CREATE", message)
+        return json_response(message)
+
+    async def get_message(self, request: web.Request) -> web.Response:
+        if (message := self.guild.messages.get(int(request.match_info["message_id"]))) is None:
+            return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+
+        return json_response(message)
+
+    async def edit_message(self, request: web.Request) -> web.Response:
+        if (message := self.guild.messages.get(int(request.match_info["message_id"]))) is None:
+            return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+
+        message.update({key: value for key, value in (await request.json()).items() if key in {"content", "embeds"}})
+        return json_response(message)
+
+    async def get_history(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        before = int(request.query.get("before", 1 << 63))
+        limit = int(request.query.get("limit", 50))
+        messages = [
+            message
+            for message_id, message in reversed(self.guild.messages.items())
+            if message["channel_id"] == channel_id and message_id < before
+        ]
+        return json_response(messages[:limit])
+
+    @staticmethod
+    async def no_content(_: web.Request) -> web.Response:
+        return web.Response(status=204)
+
+    def report(self, events: int, seconds: float) -> dict[str, Any]:
+        return {
+            "events": events,
+            "seconds": round(seconds, 4),
+            "events_per_s": round(events / seconds, 1) if seconds else 0.0,
+            "replies": len(self.reply_seconds),
+            "reply_p50_ms": round(percentile(self.reply_seconds, 0.5) * 1000, 3),
+            "reply_p99_ms": round(percentile(self.reply_seconds, 0.99) * 1000, 3),
+            "requests": dict(self.requests.most_common()),
+            "rate_limited": dict(self.rate_limited.most_common()),
+            "dispatched": dict(self.dispatched.most_common()),
+        }
+
+
+async def serve(args: argparse.Namespace, events: list[dict[str, Any]]) -> dict[str, Any] | None:
+    guild = FakeGuild(args.members, GAME_CHANNELS)
+    server = FakeDiscord(
+        guild,
+        latency=args.latency,
+        jitter=args.jitter,
+        bucket_limit=args.bucket_limit,
+        bucket_window=args.bucket_window,
+        rate_limit_chance=args.rate_limit_chance,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server.base_url = f"http://{args.host}:{args.port}"
+
+    runner = web.AppRunner(server.application())
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    logging.info("Fake Discord listening on %s, start the bot with --api-base %s", server.base_url, server.base_url)
+
+    try:
+        if not events:
+            await asyncio.Event().wait()
+
+        await server.connected.wait()
+        logging.info("Bot connected, playing %s events in %s seconds.", len(events), args.warmup)
+        await asyncio.sleep(args.warmup)
+
+        seconds = await server.play(events, args.rate)
+        await asyncio.sleep(args.cooldown)
+        return server.report(len(events), seconds)
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--events", type=int, default=0, help="events to play once the bot is ready, 0 only serves")
+    parser.add_argument("--rate", type=float, default=50.0, help="events per second, 0 as fast as possible")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input", type=Path, default=None, help="JSONL file with the events, e.g. from the replay")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per REST request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random additional seconds per REST request")
+    parser.add_argument("--bucket-limit", type=int, default=BUCKET_LIMIT, help="requests per bucket and window")
+    parser.add_argument("--bucket-window", type=float, default=BUCKET_WINDOW)
+    parser.add_argument("--rate-limit-chance", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry_after of the random 429s")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds between READY and the first event")
+    parser.add_argument("--cooldown", type=float, default=5.0, help="seconds to wait for replies after the last event")
+    parser.add_argument("--fixtures", type=Path, default=None, help="writes the data files for the bot there")
+    parser.add_argument("--triggers", type=int, default=100, help="additional response triggers of the fixtures")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)s %(message)s", force=True)
+
+    cwd = Path.cwd()
+
+    if args.fixtures is not None:
+        args.fixtures.mkdir(parents=True, exist_ok=True)
+        os.chdir(args.fixtures)
+        write_fixtures(args.members, args.triggers, args.seed)
+        Path(".env").write_text("DISCORD_TOKEN=fake-token\nSTORAGE_BACKEND=json\n", encoding="utf-8")
+
+        # main.py loads every cog it finds in ./cogs.
+        if not Path("cogs").exists():
+            Path("cogs").symlink_to(REPO_ROOT / "cogs", target_is_directory=True)
+
+        os.chdir(cwd)
+
+    if args.input is not None:
+        events = [json.loads(line) for line in args.input.read_text(encoding="utf-8").splitlines() if line]
+    else:
+        events = generate_events(args.events, args.members, args.seed)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        result = asyncio.run(serve(args, events))
+
+        if result is None:
+            return
+
+        print(  # noqa: T201
+            f"{result['events']} events in {result['seconds']:.2f} s: {result['events_per_s']:,} events/s, "
+            f"{result['replies']} replies, p50 {result['reply_p50_ms']:.1f} ms, p99 {result['reply_p99_ms']:.1f} ms"
+        )
+        for route, count in result["requests"].items():
+            print(f"{route:>64}{count:>8}{result['rate_limited'].get(route, 0):>8} x 429")  # noqa: T201
+
+        if args.output is not None:
+            args.output.write_text(json.dumps(result, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
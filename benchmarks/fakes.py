@@ -0,0 +1,247 @@
+"""A fake Discord guild for the benchmarks. It builds the gateway payloads of a guild with
+members and channels and answers the REST requests of discord.py from memory, so the real
+cogs can run without a connection.
+
+The events are fed into the parsers of discord.py's connection state, exactly like the
+gateway would, so the cogs get real Message, RawReactionActionEvent and Context objects."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import itertools
+import re
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Any
+
+import discord
+
+if TYPE_CHECKING:
+    from bot import Bot
+
+GUILD_ID = 100_000_000_000_000_000
+BOT_ID = 100_000_000_000_000_001
+SERVER_NAME = "Mövius Testserver"
+GAME_CATEGORY = "Spiele"
+STREAM_CHANNEL = "stream"
+MESSAGE_CACHE_SIZE = 10000
+
+_MESSAGE_ID = re.compile(r"/messages/(\d+)")
+
+
+class FakeGuild:
+    """Members, channels and recent messages of a guild, as gateway payloads."""
+
+    def __init__(self, members: int = 50, game_channels: tuple[str, ...] = ("minecraft", "overwatch")) -> None:
+        self._ids = itertools.count(GUILD_ID + 2)
+        self.bot_user = self.user_payload(BOT_ID, "Moevius", bot=True)
+        self.members = [self.user_payload(self.next_id(), f"member{index}") for index in range(members)]
+        self.channels: dict[str, dict[str, Any]] = {}
+        self.messages: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        self.event_messages: list[int] = []
+
+        self.category = self.channel_payload(GAME_CATEGORY, channel_type=discord.ChannelType.category)
+        self.channels[STREAM_CHANNEL] = self.channel_payload(STREAM_CHANNEL)
+        self.channels["general"] = self.channel_payload("general")
+
+        for name in game_channels:
+            self.channels[name] = self.channel_payload(name, parent_id=self.category["id"])
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    @staticmethod
+    def user_payload(user_id: int, name: str, *, bot: bool = False) -> dict[str, Any]:
+        return {
+            "id": str(user_id),
+            "username": name,
+            "discriminator": "0",
+            "global_name": name,
+            "avatar": None,
+            "bot": bot,
+        }
+
+    @staticmethod
+    def member_payload(user: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "user": user,
+            "roles": [],
+            "joined_at": "2020-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+
+    def channel_payload(
+        self,
+        name: str,
+        parent_id: str | None = None,
+        channel_type: discord.ChannelType = discord.ChannelType.text,
+        channel_id: str | None = None,
+    ) -> dict[str, Any]:
+        return {
+            "id": channel_id or str(self.next_id()),
+            "guild_id": str(GUILD_ID),
+            "type": channel_type.value,
+            "name": name,
+            "position": 0,
+            "parent_id": parent_id,
+            "permission_overwrites": [],
+            "nsfw": False,
+            "topic": None,
+            "rate_limit_per_user": 0,
+        }
+
+    def guild_payload(self) -> dict[str, Any]:
+        return {
+            "id": str(GUILD_ID),
+            "name": SERVER_NAME,
+            "owner_id": self.members[0]["id"],
+            "roles": [
+                {
+                    "id": str(GUILD_ID),
+                    "name": "@everyone",
+                    "permissions": "0",
+                    "position": 0,
+                    "color": 0,
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                }
+            ],
+            "channels": [self.category, *self.channels.values()],
+            "members": [self.member_payload(user) for user in (self.bot_user, *self.members)],
+            "member_count": len(self.members) + 1,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+        }
+
+    def message_payload(
+        self, channel_id: str, author: dict[str, Any], content: str, embeds: list[dict] | None = None
+    ) -> dict[str, Any]:
+        message = {
+            "id": str(self.next_id()),
+            "channel_id": channel_id,
+            "guild_id": str(GUILD_ID),
+            "author": author,
+            "member": {key: value for key, value in self.member_payload(author).items() if key != "user"},
+            "content": content,
+            "timestamp": dt.datetime.now(tz=dt.UTC).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": embeds or [],
+            "pinned": False,
+            "type": 0,
+        }
+
+        self.messages[int(message["id"])] = message
+
+        if len(self.messages) > MESSAGE_CACHE_SIZE:
+            self.messages.popitem(last=False)
+
+        return message
+
+    def reaction_payload(self, message: dict[str, Any], user: dict[str, Any], emoji: str = "Moevius") -> dict[str, Any]:
+        return {
+            "user_id": user["id"],
+            "channel_id": message["channel_id"],
+            "message_id": message["id"],
+            "guild_id": str(GUILD_ID),
+            "message_author_id": message["author"]["id"],
+            "member": self.member_payload(user),
+            "emoji": {"id": None, "name": emoji},
+            "burst": False,
+            "type": 0,
+        }
+
+    def event_payload(self, event: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Turns an event of a benchmark stream into a gateway event. The messages of the
+        stream are counted, so reactions can refer to them by their index.
+
+        Returns:
+            tuple[str, dict[str, Any]]: Name and payload of the gateway event."""
+
+        match event["type"]:
+            case "message" | "command":
+                author = self.members[event["author"] % len(self.members)]
+                message = self.message_payload(self.channels[event["channel"]]["id"], author, event["content"])
+                self.event_messages.append(int(message["id"]))
+                return "MESSAGE_CREATE", message
+
+            case "reaction_add" | "reaction_remove":
+                message_id = self.event_messages[event["message"] % len(self.event_messages)]
+                message = self.messages.get(message_id) or next(reversed(self.messages.values()))
+                user = self.members[event["user"] % len(self.members)]
+                name = "MESSAGE_REACTION_ADD" if event["type"] == "reaction_add" else "MESSAGE_REACTION_REMOVE"
+                return name, self.reaction_payload(message, user)
+
+            case "channel":
+                if (channel := self.channels.pop(event["name"], None)) is not None:
+                    return "CHANNEL_DELETE", channel
+
+                channel = self.channel_payload(event["name"], parent_id=self.category["id"])
+                self.channels[event["name"]] = channel
+                return "CHANNEL_CREATE", channel
+
+        msg = f"Unknown event type: {event['type']}"
+        raise ValueError(msg)
+
+
+class FakeHTTP:
+    """Answers the requests of discord.py's HTTP client from the fake guild. Every request
+    is counted per route, the latency can be set to emulate the network."""
+
+    def __init__(self, guild: FakeGuild, latency: float = 0.0) -> None:
+        self.guild = guild
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+
+    async def request(self, route: discord.http.Route, **kwargs: Any) -> Any:  # noqa: ANN401
+        self.requests[f"{route.method} {route.path}"] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        match route.method, route.path:
+            case "POST", "/channels/{channel_id}/messages":
+                payload = kwargs.get("json") or {}
+                return self.guild.message_payload(
+                    str(route.channel_id), self.guild.bot_user, payload.get("content") or "", payload.get("embeds")
+                )
+
+            case "GET", "/channels/{channel_id}/messages/{message_id}":
+                message_id = int(_MESSAGE_ID.search(route.url).group(1))
+                return self.guild.messages.get(message_id) or self.guild.message_payload(
+                    str(route.channel_id), self.guild.members[0], ""
+                )
+
+            case "GET", "/channels/{channel_id}/messages":
+                params = kwargs.get("params") or {}
+                before = int(params.get("before", 1 << 63))
+                messages = [
+                    message
+                    for message_id, message in reversed(self.guild.messages.items())
+                    if message["channel_id"] == str(route.channel_id) and message_id < before
+                ]
+                return messages[: int(params.get("limit", 50))]
+
+        return None
+
+
+def install(bot: Bot, guild: FakeGuild, http: FakeHTTP) -> discord.Guild:
+    """Connects the bot to the fake guild instead of Discord. Has to be called on the loop,
+    before the cogs are loaded."""
+
+    state = bot._connection  # noqa: SLF001
+    bot.http.request = http.request
+    state.user = discord.ClientUser(state=state, data=guild.bot_user)
+
+    discord_guild = discord.Guild(data=guild.guild_payload(), state=state)
+    state._add_guild(discord_guild)  # noqa: SLF001
+
+    return discord_guild
@@ -0,0 +1,135 @@
+"""Benchmark for the response triggers. Matches random chat messages against 10, 100 and
+1000 triggers, once with a re.search per trigger like before and once with the combined
+TriggerMatcher, and prints the throughput in messages per second.
+
+Usage: python -m benchmarks.matcher_bench [--messages N] [--output result.json]"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import string
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.matcher_tools import TriggerMatcher
+
+TRIGGER_COUNTS = (10, 100, 1000)
+# Triggers with escapes and constructs the literal analysis has to handle, each with a
+# message it matches.
+EDGE_CASES = {
+    r"\x41bc": "Abc",
+    r"\101bc": "Abc",
+    r"\u00e4rger": "ärger",
+    r"\U0001F54Aflug": "\U0001f54aflug",
+    r"\N{LATIN SMALL LETTER A}x": "ax",
+    r"(a)\1b": "aab",
+    r"\0x": "\0x",
+    r"\.krah": ".krah",
+    r"(?i)\bkr\x41h\b": "KRAH krah",
+    r"[\x41-\x43]rah": "Brah",
+    r"moin\s+\w+": "moin leute",
+    r"stream(s|ing)?": "streaming",
+}
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def generate_triggers(rng: random.Random, count: int) -> list[str]:
+    """Triggers in the styles found in responses.json: plain words, case insensitive words
+    and regular expressions with word boundaries or alternatives."""
+
+    styles = (
+        lambda: _word(rng),
+        lambda: "(?i)" + _word(rng),
+        lambda: rf"(?i)\b{_word(rng)}\b",
+        lambda: rf"\b({_word(rng)}|{_word(rng)})s?\b",
+    )
+
+    return list(dict.fromkeys(rng.choice(styles)() for _ in range(count)))
+
+
+def generate_messages(rng: random.Random, count: int) -> list[str]:
+    return [" ".join(_word(rng) for _ in range(rng.randint(3, 25))) for _ in range(count)]
+
+
+def check_edge_cases() -> None:
+    """Checks that TriggerMatcher agrees with re.search on EDGE_CASES, every trigger
+    against the message of every other trigger."""
+
+    triggers = list(EDGE_CASES)
+    matcher = TriggerMatcher(triggers)
+
+    for text in EDGE_CASES.values():
+        if (expected := naive_match(triggers, text)) != (found := matcher.match(text)):
+            msg = f"TriggerMatcher and re.search disagree on {text!r}: {found} instead of {expected}!"
+            raise RuntimeError(msg)
+
+
+def naive_match(triggers: list[str], text: str) -> list[str]:
+    return [key for key in triggers if re.search(key, text)]
+
+
+def measure(triggers: list[str], messages: list[str]) -> dict[str, Any]:
+    """Returns build time and throughput of both strategies and checks that they agree."""
+
+    start = time.perf_counter()
+    matcher = TriggerMatcher(triggers)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    naive_results = [naive_match(triggers, message) for message in messages]
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher_results = [matcher.match(message) for message in messages]
+    matcher_seconds = time.perf_counter() - start
+
+    if naive_results != matcher_results:
+        msg = "TriggerMatcher and re.search disagree!"
+        raise RuntimeError(msg)
+
+    return {
+        "triggers": len(triggers),
+        "build_ms": round(build_ms, 3),
+        "naive_msg_per_s": round(len(messages) / naive_seconds),
+        "matcher_msg_per_s": round(len(messages) / matcher_seconds),
+        "matches": sum(map(len, matcher_results)),
+    }
+
+
+def run(messages: int = 2000, seed: int = 0) -> list[dict[str, Any]]:
+    check_edge_cases()
+
+    rng = random.Random(seed)  # noqa: S311
+    texts = generate_messages(rng, messages)
+
+    return [measure(generate_triggers(rng, count), texts) for count in TRIGGER_COUNTS]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = run(args.messages)
+
+    print(f"{'triggers':>10}{'build ms':>12}{'re.search msg/s':>18}{'matcher msg/s':>16}{'speedup':>10}")  # noqa: T201
+    for row in results:
+        print(  # noqa: T201
+            f"{row['triggers']:>10}{row['build_ms']:>12.3f}{row['naive_msg_per_s']:>18,}"
+            f"{row['matcher_msg_per_s']:>16,}{row['matcher_msg_per_s'] / row['naive_msg_per_s']:>9.1f}x"
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Microbenchmarks for the helpers in tools/ which sit on hot paths: DictFile.__setitem__
+with every persistence, convert_str_to_dt, convert_choices_to_list, CustomFormatter.format,
+lines_from_textfile and strfdelta, each on realistic inputs.
+
+The results are compared with the baseline in benchmarks/baselines/micro_bench.json. A case
+is flagged as regression if its best round is more than --threshold slower, then the
+runner exits with 1. The best round is compared instead of the median, because it is the
+least disturbed by other processes. --save writes the results as new baseline. Timings depend on the machine, so
+the baseline should be saved on the machine it is compared on. The baseline records the Python version (major.minor),
+the machine and the JSON codec. If there is no baseline or one of them differs, the results are not compared and the
+runner exits with 2, unless --save records a new baseline.
+
+Usage: python -m benchmarks.micro_bench [--filter NAME] [--threshold 0.25] [--save]"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import itertools
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from tools.codec_tools import CODEC
+from tools.converter_tools import convert_choices_to_list, convert_str_to_dt
+from tools.dt_tools import strfdelta
+from tools.io_tools import shutdown_io_executor
+from tools.json_tools import DictFile, Persistence
+from tools.logger_tools import CustomFormatter
+from tools.textfile_tools import lines_from_textfile
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    type Case = Callable[[int], float]
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "micro_bench.json"
+DEFAULT_THRESHOLD = 0.25
+MIN_TIME = 0.2
+REPEAT = 7
+FAITH_MEMBERS = 2000
+
+
+def sync_case(func: Callable[[], object]) -> Case:
+    return timeit.Timer(func).timeit
+
+
+def loop_case(loop: asyncio.AbstractEventLoop, func: Callable[[], object]) -> Case:
+    """Calls a synchronous function inside the running loop, e.g. a DictFile which
+    schedules its flush on the loop."""
+
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+
+        for _ in range(number):
+            func()
+
+        return time.perf_counter() - start
+
+    return lambda number: loop.run_until_complete(run(number))
+
+
+def async_case(loop: asyncio.AbstractEventLoop, func: Callable[[], Awaitable[object]]) -> Case:
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+
+        for _ in range(number):
+            await func()
+
+        return time.perf_counter() - start
+
+    return lambda number: loop.run_until_complete(run(number))
+
+
+def reference() -> str:
+    """Fixed pure Python work. It is measured in every run, the results are scaled by it
+    before they are compared, so a generally slower or faster machine isn't a regression."""
+
+    counts: dict[int, int] = {}
+
+    for index in range(200):
+        counts[index % 13] = counts.get(index % 13, 0) + index
+
+    return ",".join(f"{key}:{value}" for key, value in sorted(counts.items()))
+
+
+def calibrate(case: Case, min_time: float) -> int:
+    """Returns the number of calls which take about min_time."""
+
+    number = 1
+
+    while (elapsed := case(number)) < min_time / 10:
+        number *= 10
+
+    return max(number, math.ceil(number * min_time / elapsed))
+
+
+def measure(cases: dict[str, Case], min_time: float = MIN_TIME, repeat: int = REPEAT) -> dict[str, Any]:
+    """Times every case repeat times. Each round runs every case once, so a disturbance
+    by another process spreads over all cases instead of hitting one.
+
+    Returns:
+        dict[str, Any]: Calls per round and the best and median nanoseconds per call of each case."""
+
+    numbers = {name: calibrate(case, min_time) for name, case in cases.items()}
+    timings: dict[str, list[float]] = {name: [] for name in cases}
+
+    for _ in range(repeat):
+        for name, case in cases.items():
+            timings[name].append(case(numbers[name]) / numbers[name] * 1e9)
+
+    return {
+        name: {
+            "number": numbers[name],
+            "best_ns": round(min(timings[name]), 1),
+            "median_ns": round(statistics.median(timings[name]), 1),
+        }
+        for name in cases
+    }
+
+
+def _log_record(message: str, args: tuple, exc_info: Any = None) -> logging.LogRecord:  # noqa: ANN401
+    return logging.LogRecord("moevius", logging.INFO, __file__, 42, message, args, exc_info, func="add_faith")
+
+
+def _exc_info() -> Any:  # noqa: ANN401
+    try:
+        {}["missing"]
+    except KeyError:
+        return sys.exc_info()
+
+
+def build_cases(workdir: Path, loop: asyncio.AbstractEventLoop) -> tuple[dict[str, Case], list[DictFile]]:
+    """Creates the inputs in the working directory.
+
+    Returns:
+        tuple[dict[str, Case], list[DictFile]]: The cases by name and the DictFiles to close."""
+
+    rng = random.Random(0)  # noqa: S311
+    members = [str(rng.randint(10**17, 10**18)) for _ in range(FAITH_MEMBERS)]
+    faith = {member: rng.randint(-50, 25_000) for member in members}
+    path = f"{workdir}/"
+
+    stores = {}
+
+    for persistence in Persistence:
+        name = f"faith_{persistence.name.lower()}"
+        (workdir / f"{name}.json").write_text(json.dumps(faith), encoding="utf-8")
+        stores[persistence] = DictFile(name, path=path, persistence=persistence)
+
+    fragen = workdir / "fragen.txt"
+    fragen.write_text("\n".join(f"Wer hat als letztes {rng.choice(members)} gesagt?" for _ in range(1000)), "utf-8")
+    messages = workdir / "channel_messages.txt"
+    words = ("krah", "moin", "stream", "heute", "abend", "wer", "ist", "dabei", "mövius", "gg")
+    messages.write_text("\n".join(" ".join(rng.choices(words, k=12)) for _ in range(20_000)), "utf-8")
+
+    formatter = CustomFormatter()
+    plain = _log_record("Bot ready!", ())
+    with_args = _log_record("%s hat %s Punkte bekommen.", ("member42", 5))
+    with_exception = _log_record("Command failed: %s", ("!faith",), _exc_info())
+
+    def set_faith(store: DictFile) -> Callable[[], None]:
+        keys = itertools.cycle(rng.choices(members, k=10_000))
+        return lambda: store.__setitem__(next(keys), 1)
+
+    cases = {
+        "reference": sync_case(reference),
+        "dictfile_setitem_sync": sync_case(set_faith(stores[Persistence.SYNC])),
+        "dictfile_setitem_write_behind": loop_case(loop, set_faith(stores[Persistence.WRITE_BEHIND])),
+        "dictfile_setitem_journal": sync_case(set_faith(stores[Persistence.JOURNAL])),
+        "convert_str_to_dt_time": async_case(loop, lambda: convert_str_to_dt("20:15")),
+        "convert_str_to_dt_date": async_case(loop, lambda: convert_str_to_dt("24.12. 18:00")),
+        "convert_choices_to_list_4": sync_case(lambda: convert_choices_to_list("Pizza; Döner ; ;Burger;Sushi;")),
+        "convert_choices_to_list_20": sync_case(
+            lambda: convert_choices_to_list(";".join(f" Antwort {index} " for index in range(20)))
+        ),
+        "custom_formatter_plain": sync_case(lambda: formatter.format(plain)),
+        "custom_formatter_args": sync_case(lambda: formatter.format(with_args)),
+        "custom_formatter_exception": sync_case(lambda: formatter.format(with_exception)),
+        "lines_from_textfile_1k": async_case(loop, lambda: lines_from_textfile(str(fragen))),
+        "lines_from_textfile_20k": async_case(loop, lambda: lines_from_textfile(str(messages))),
+        "strfdelta_default": sync_case(lambda: strfdelta(dt.timedelta(days=3, seconds=4242))),
+        "strfdelta_custom": sync_case(
+            lambda: strfdelta(dt.timedelta(hours=5, seconds=17), "{hours} Stunden und {minutes} Minuten")
+        ),
+    }
+
+    return cases, list(stores.values())
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Prints the results next to the baseline. The change is scaled by the reference.
+
+    Returns:
+        list[str]: Names of the cases which are slower than the baseline plus threshold."""
+
+    regressions = []
+    scale = results["reference"]["best_ns"] / baseline["reference"]["best_ns"] if "reference" in baseline else 1.0
+
+    print(f"Machine speed compared to the baseline: {1 / scale:.0%}")  # noqa: T201
+    print(f"{'case':<32}{'baseline':>14}{'current':>14}{'change':>10}")  # noqa: T201
+
+    for name, result in results.items():
+        if name == "reference":
+            continue
+
+        if (previous := baseline.get(name)) is None:
+            print(f"{name:<32}{'-':>14}{result['best_ns']:>11,.0f} ns{'new':>10}")  # noqa: T201
+            continue
+
+        change = result["best_ns"] / (previous["best_ns"] * scale) - 1
+        flag = ""
+
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print(  # noqa: T201
+            f"{name:<32}{previous['best_ns']:>11,.0f} ns{result['best_ns']:>11,.0f} ns{change:>+10.1%}{flag}"
+        )
+
+    return regressions
+
+
+def environment() -> dict[str, str]:
+    """Returns what the timings depend on besides the code and the speed of the machine:
+    the Python version without the patch level, the architecture and the JSON codec, which
+    decides e.g. how fast a DictFile is written."""
+
+    python = ".".join(platform.python_version_tuple()[:2])
+    return {"python": python, "machine": platform.machine(), "codec": CODEC.value}
+
+
+def save_baseline(path: Path, results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Writes the results as baseline. If a previous baseline is given, the results are
+    merged into it and scaled to its reference, so all cases stay comparable."""
+
+    cases = baseline.get("cases", {})
+
+    if "reference" in cases:
+        scale = results["reference"]["best_ns"] / cases["reference"]["best_ns"]
+        results = {
+            name: {
+                **result,
+                "best_ns": round(result["best_ns"] / scale, 1),
+                "median_ns": round(result["median_ns"] / scale, 1),
+            }
+            for name, result in results.items()
+            if name != "reference"
+        }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {**environment(), "cases": {**cases, **results}},
+            indent=4,
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only runs the cases which contain this text")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="share a case may be slower")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per round")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="writes the results as new baseline")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    with tempfile.TemporaryDirectory(prefix="moevius-micro-") as workdir:
+        cases, stores = build_cases(Path(workdir), loop)
+        selected = {name: case for name, case in cases.items() if args.filter in name or name == "reference"}
+        results = measure(selected, args.min_time, args.repeat)
+
+        for store in stores:
+            loop.run_until_complete(store.aclose())
+
+        loop.close()
+        shutdown_io_executor()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    usable = bool(baseline)
+
+    if not baseline:
+        print(f"There is no baseline at {args.baseline}, the results are not compared.")  # noqa: T201
+    elif differences := {key: value for key, value in environment().items() if baseline.get(key) != value}:
+        changes = ", ".join(
+            f"{key} {baseline.get(key, 'unknown')} instead of {value}" for key, value in differences.items()
+        )
+        print(f"The baseline was measured with {changes}, the results are not compared.")  # noqa: T201
+        baseline = {}
+        usable = False
+
+    regressions = compare(results, baseline.get("cases", {}), args.threshold)
+
+    if args.save:
+        save_baseline(args.baseline, results, baseline if args.filter else {})
+        print(f"Baseline saved to {args.baseline}.")  # noqa: T201
+        return
+
+    if not usable:
+        print("Record a baseline for this environment with --save.")  # noqa: T201
+        sys.exit(2)
+
+    if regressions:
+        print(f"{len(regressions)} regressions above {args.threshold:.0%}: {', '.join(regressions)}")  # noqa: T201
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
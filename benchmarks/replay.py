@@ -0,0 +1,325 @@
+"""Offline replay benchmark for the cogs. Creates the Bot with a fake guild instead of a
+connection, loads the real cogs (Misc, Faith, Quiz, Squads, Reminder) and replays a stream
+of messages, commands, reactions and channel events through discord.py's gateway parsers.
+
+Reports the events per second, the p50/p99 latency until all handlers of an event are done
+and the bytes written per event (from /proc/self/io). The stream is generated from a seed
+or read from a JSONL file with one event per line, e.g. one written with --record.
+
+Usage: python -m benchmarks.replay [--events N] [--input events.jsonl] [--output result.json]"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+COGS = ("cogs.misc", "cogs.faith", "cogs.quiz", "cogs.squads", "cogs.reminder")
+COMMANDS = ("!faith", "!faith 2", "!faith rank", "!faith top", "!bibel", "!frage", "!stream")
+GAME_COMMANDS = ("!hey", "!squad")
+WORDS = (  # noqa: SIM905
+    "krah moin hallo pizza döner stream heute abend spielen wer ist dabei ich bin raus mövius gg ez lol "
+    "warum nicht morgen vielleicht minecraft overwatch server update patch neue season"
+).split()
+GAME_CHANNELS = ("minecraft", "overwatch")
+EVENT_WEIGHTS = {"message": 70, "command": 10, "reaction_add": 12, "reaction_remove": 5, "quiz": 2, "channel": 1}
+TRIGGERS = {
+    "(?i)krah": "Krah Krah, {message.author.mention}!",
+    r"\bmoin\b": "Moin {message.author.display_name}!",
+    r"(?i)\b(pizza|döner)\b": "Hat hier jemand {match[1]} gesagt?",
+}
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fakes import GUILD_ID, STREAM_CHANNEL, FakeGuild, FakeHTTP, install  # noqa: E402
+from bot import Bot  # noqa: E402
+from tools.storage_tools import DEFAULT_DB_PATH, StorageBackend, get_storage_backend, import_json_files  # noqa: E402
+
+
+def generate_events(count: int, members: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Generates a stream of events. Members and messages are referenced by their index,
+    so the stream can be saved and replayed against a fresh fake guild."""
+
+    rng = random.Random(seed)  # noqa: S311
+    channels = ["general", STREAM_CHANNEL, *GAME_CHANNELS]
+    events: list[dict[str, Any]] = []
+    messages = 0
+
+    while len(events) < count:
+        kind = rng.choices(list(EVENT_WEIGHTS), weights=list(EVENT_WEIGHTS.values()))[0]
+        channel = rng.choice(channels)
+        author = rng.randrange(members)
+
+        match kind:
+            case "message":
+                content = " ".join(rng.choices(WORDS, k=rng.randint(2, 15)))
+                events.append({"type": "message", "channel": channel, "author": author, "content": content})
+                messages += 1
+            case "command":
+                content = rng.choice(GAME_COMMANDS if channel in GAME_CHANNELS else COMMANDS)
+                events.append({"type": "command", "channel": channel, "author": author, "content": content})
+                messages += 1
+            case "reaction_add" | "reaction_remove" if messages:
+                message = rng.randrange(max(messages - 50, 0), messages)
+                events.append({"type": kind, "message": message, "user": author})
+            case "quiz":
+                answers = rng.randint(1, 5)
+                events.append({"type": "command", "channel": channel, "author": author, "content": "!quiz"})
+                events.extend(
+                    {"type": "message", "channel": channel, "author": author, "content": rng.choice("ABCD")}
+                    for _ in range(answers)
+                )
+                messages += 1 + answers
+            case "channel":
+                events.append({"type": "channel", "name": f"game{rng.randrange(5)}"})
+
+    return events[:count]
+
+
+def write_fixtures(members: int, triggers: int, seed: int = 0) -> None:
+    """Writes the data files the cogs need into the working directory."""
+
+    rng = random.Random(seed)  # noqa: S311
+    Path("json").mkdir(exist_ok=True)
+    Path("logs").mkdir(exist_ok=True)
+
+    settings = {
+        "server_id": str(GUILD_ID),
+        "channels": {"stream": STREAM_CHANNEL},
+        "faith_on_react": 5,
+        "faith_by_command": {
+            "faith": 0,
+            "faith rank": 0,
+            "faith top": 0,
+            "bibel": 1,
+            "frage": 1,
+            "quiz": 1,
+            "hey": 2,
+            "squad": 0,
+            "stream": 0,
+        },
+        "super-users": ["member0"],
+    }
+    responses = {
+        "req": {"hallo": {"res": ["Hallo {message.author.mention}, Krah Krah!"], "log": "Hallo"}},
+        "res": {key: {"res": [text], "log": f"Trigger {key}"} for key, text in TRIGGERS.items()},
+    }
+    responses["res"].update(
+        {f"(?i)\\bwort{index}\\b": {"res": [f"Wort {index}!"], "log": "Wort"} for index in range(triggers)}
+    )
+    quiz = [
+        {
+            "question": f"Frage {index}?",
+            "category": rng.choice(["Spiele", "Geschichte", "Mövius"]),
+            "range": [0, 1000000],
+            "answers": [{"text": f"Antwort {answer}", "correct": answer == 0} for answer in range(4)],
+        }
+        for index in range(200)
+    ]
+
+    Path("json/settings.json").write_text(json.dumps(settings), encoding="utf-8")
+    Path("json/responses.json").write_text(json.dumps(responses), encoding="utf-8")
+    Path("json/quiz.json").write_text(json.dumps(quiz), encoding="utf-8")
+    Path("json/squads.json").write_text(
+        json.dumps({"minecraft": {f"member{index}": str(index) for index in range(min(members, 5))}}), encoding="utf-8"
+    )
+    Path("fragen.txt").write_text("\n".join(f"Frage {index}?" for index in range(100)), encoding="utf-8")
+    if get_storage_backend() is StorageBackend.SQLITE:
+        import_json_files(db_path=os.getenv("STORAGE_PATH", DEFAULT_DB_PATH), overwrite=True)
+
+    Path("moevius-bibel.txt").write_text(
+        "\n".join(f"Vers {index}, Krah Krah!" for index in range(100)), encoding="utf-8"
+    )
+
+
+def read_io_counters() -> dict[str, int]:
+    """Returns the I/O counters of the process. wchar counts every write call, write_bytes
+    only what reached the storage layer. Empty if /proc is not available."""
+
+    try:
+        lines = Path("/proc/self/io").read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return {}
+
+    return {key: int(value) for key, value in (line.split(": ") for line in lines)}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+async def settle(baseline: set[asyncio.Task]) -> None:
+    """Waits until every task started since the baseline is done, including the tasks these
+    tasks start, e.g. a router handler which queues a message in the outbox."""
+
+    while pending := [task for task in asyncio.all_tasks() if task not in baseline and not task.done()]:
+        await asyncio.wait(pending)
+
+
+class Replay:
+    """Runs a stream of events against the bot and measures every event."""
+
+    def __init__(self, guild: FakeGuild, http: FakeHTTP) -> None:
+        self.guild = guild
+        self.http = http
+        self.bot = Bot()
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.baseline: set[asyncio.Task] = set()
+
+    async def setup(self) -> None:
+        await self.prepare()
+
+        for cog in COGS:
+            await self.load_cog(cog)
+
+    async def prepare(self) -> None:
+        """Connects the bot to the fake guild and loads the stores, without any cog."""
+
+        bot = self.bot
+
+        await bot._async_setup_hook()  # noqa: SLF001
+        install(bot, self.guild, self.http)
+
+        await bot.load_stores()
+        await bot.analyze_guild()
+
+        # Like the Administration cog of main.py, which isn't loaded here.
+        for name in ("on_guild_channel_create", "on_guild_channel_delete", "on_guild_channel_update"):
+            bot.add_listener(self._analyze_guild, name)
+
+        bot.add_listener(self._command_error, "on_command_error")
+
+    async def load_cog(self, cog: str) -> None:
+        await self.bot.load_extension(cog)
+        self.baseline = asyncio.all_tasks()
+
+    async def _analyze_guild(self, *_: Any) -> None:  # noqa: ANN401
+        await self.bot.analyze_guild()
+
+    async def _command_error(self, ctx: Any, error: Exception) -> None:  # noqa: ANN401
+        logging.debug("%s - %s", ctx.message.content, error)
+
+    def feed(self, event: dict[str, Any]) -> None:
+        name, payload = self.guild.event_payload(event)
+        self.bot._connection.parsers[name](payload)  # noqa: SLF001
+
+    async def run(self, events: list[dict[str, Any]]) -> float:
+        start = time.perf_counter()
+
+        for event in events:
+            event_start = time.perf_counter()
+            self.feed(event)
+            await settle(self.baseline)
+            self.latencies[event["type"]].append(time.perf_counter() - event_start)
+
+        return time.perf_counter() - start
+
+    async def close(self) -> None:
+        for cog in list(self.bot.extensions):
+            await self.bot.unload_extension(cog)
+
+        await self.bot.close()
+
+
+async def replay(events: list[dict[str, Any]], members: int, latency: float = 0.0) -> dict[str, Any]:
+    guild = FakeGuild(members, GAME_CHANNELS)
+    http = FakeHTTP(guild, latency)
+    runner = Replay(guild, http)
+
+    await runner.setup()
+
+    io_before = read_io_counters()
+    seconds = await runner.run(events)
+    await runner.close()
+    io_after = read_io_counters()
+
+    written = {key: io_after[key] - io_before[key] for key in ("wchar", "write_bytes") if key in io_after}
+    all_latencies = [latency for latencies in runner.latencies.values() for latency in latencies]
+
+    return {
+        "events": len(events),
+        "seconds": round(seconds, 4),
+        "events_per_s": round(len(events) / seconds, 1),
+        "p50_ms": round(percentile(all_latencies, 0.5) * 1000, 4),
+        "p99_ms": round(percentile(all_latencies, 0.99) * 1000, 4),
+        "by_type": {
+            kind: {
+                "events": len(latencies),
+                "p50_ms": round(percentile(latencies, 0.5) * 1000, 4),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+            }
+            for kind, latencies in sorted(runner.latencies.items())
+        },
+        "bytes_written": written,
+        "bytes_per_event": {key: round(value / len(events), 1) for key, value in written.items()},
+        "command_errors": sum(stats.errors for stats in runner.bot.metrics.commands.values()),
+        "http_requests": dict(http.requests),
+        "storage_backend": get_storage_backend().value,
+        "python": platform.python_version(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--triggers", type=int, default=100, help="additional response triggers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake REST request")
+    parser.add_argument("--input", type=Path, default=None, help="JSONL file with the events to replay")
+    parser.add_argument("--record", type=Path, default=None, help="writes the generated events as JSONL")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--workdir", type=Path, default=None, help="keeps the data files there instead of a temp dir")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, force=True)
+
+    if args.input is not None:
+        events = [json.loads(line) for line in args.input.read_text(encoding="utf-8").splitlines() if line]
+    else:
+        events = generate_events(args.events, args.members, args.seed)
+
+    if args.record is not None:
+        args.record.write_text("".join(json.dumps(event) + "\n" for event in events), encoding="utf-8")
+
+    output = args.output.resolve() if args.output is not None else None
+
+    with tempfile.TemporaryDirectory(prefix="moevius-replay-") as temp_dir:
+        workdir = args.workdir or Path(temp_dir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        os.chdir(workdir)
+        write_fixtures(args.members, args.triggers, args.seed)
+
+        result = asyncio.run(replay(events, args.members, args.latency))
+
+        os.chdir(REPO_ROOT)
+
+    print(  # noqa: T201
+        f"{result['events']} events in {result['seconds']:.2f} s: {result['events_per_s']:,} events/s, "
+        f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms"
+    )
+    for kind, stats in result["by_type"].items():
+        print(f"{kind:>16}{stats['events']:>8}{stats['p50_ms']:>10.3f} ms{stats['p99_ms']:>10.3f} ms")  # noqa: T201
+    for key, value in result["bytes_per_event"].items():
+        print(f"{key:>16}{value:>12,.1f} bytes/event")  # noqa: T201
+
+    if output is not None:
+        output.write_text(json.dumps(result, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Scaling test for the data files. For every scale, a fresh process generates the data
+set of benchmarks/datasets.py, starts the bot against the fake guild of the replay
+benchmark and measures:
+
+- how long loading the stores and the setup of each cog takes, with the memory used since
+  the data was generated,
+- the key commands (!faith, !faith rank, !faith top, !squad, !zitat) and chat messages
+  through the responses of Misc,
+- DictFile.__setitem__ and the flush of faith.json, Quiz.get_random_question,
+  Quote.build_markov and reading the log like !bot log,
+- the peak memory of the process.
+
+At scale 1 the markov model of 2 million sentences needs several GB of memory, so the
+default scales stop at 0.1. A scale which fails or runs out of time is reported as such.
+
+Usage: python -m benchmarks.scaling [--scales 0.01 0.1 1] [--output result.json]"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SCALES = (0.01, 0.1)
+SCALING_COGS = ("cogs.misc", "cogs.faith", "cogs.quiz", "cogs.squads", "cogs.quote")
+SCALING_COMMANDS = (
+    ("general", "!faith"),
+    ("general", "!faith rank"),
+    ("general", "!faith top"),
+    ("minecraft", "!squad"),
+    ("general", "!zitat"),
+)
+DEFAULT_REPEAT = 20
+DEFAULT_TIMEOUT = 1800.0
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.datasets import write_dataset  # noqa: E402
+from benchmarks.fakes import FakeGuild, FakeHTTP  # noqa: E402
+from benchmarks.replay import GAME_CHANNELS, Replay, generate_events, settle  # noqa: E402
+from tools.textfile_tools import lines_from_textfile  # noqa: E402
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+def rss_mb() -> float:
+    """Returns the current resident memory of the process, the peak if /proc is not available."""
+
+    try:
+        pages = int(Path("/proc/self/statm").read_text(encoding="utf-8").split()[1])
+    except OSError:
+        return peak_rss_mb()
+
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def median_ms(func: Callable[[], Awaitable[object]], repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+
+    return round(statistics.median(timings) * 1000, 3)
+
+
+async def measure_scale(scale: float, members: int, seed: int, repeat: int) -> dict[str, Any]:
+    """Generates the data set in the working directory and measures the bot with it.
+
+    Returns:
+        dict[str, Any]: The scale, the sizes of the files and the metrics by name."""
+
+    guild = FakeGuild(members, GAME_CHANNELS)
+    metrics: dict[str, float] = {}
+
+    start = time.perf_counter()
+    files = write_dataset(scale, guild, seed)
+    metrics["generate data [s]"] = round(time.perf_counter() - start, 3)
+
+    runner = Replay(guild, FakeHTTP(guild))
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    await runner.prepare()
+    metrics["load stores [s]"] = round(time.perf_counter() - start, 3)
+    metrics["memory after stores [MB]"] = round(rss_mb() - base_rss, 1)
+
+    for cog in SCALING_COGS:
+        start = time.perf_counter()
+        await runner.load_cog(cog)
+        metrics[f"setup {cog} [s]"] = round(time.perf_counter() - start, 3)
+        metrics[f"memory after {cog} [MB]"] = round(rss_mb() - base_rss, 1)
+
+    for channel, content in SCALING_COMMANDS:
+
+        async def command(channel: str = channel, content: str = content) -> None:
+            runner.feed({"type": "command", "channel": channel, "author": 0, "content": content})
+            await settle(runner.baseline)
+
+        metrics[f"{content} [ms]"] = await median_ms(command, repeat)
+
+    messages = [event for event in generate_events(repeat * 50, members, seed) if event["type"] == "message"]
+    await runner.run(messages)
+    metrics["chat message p50 [ms]"] = round(statistics.median(runner.latencies["message"]) * 1000, 3)
+
+    faith = runner.bot.stores["faith"]
+    member_id = guild.members[0]["id"]
+
+    async def set_faith() -> None:
+        faith[member_id] = faith.get(member_id, 0) + 1
+
+    metrics["DictFile.__setitem__ faith [ms]"] = await median_ms(set_faith, repeat)
+
+    if (aflush := getattr(faith, "aflush", None)) is not None:
+
+        async def flush_faith() -> None:
+            await set_faith()
+            await aflush()
+
+        metrics["flush faith [ms]"] = await median_ms(flush_faith, max(repeat // 4, 1))
+
+    quiz = runner.bot.get_cog("Quiz")
+    metrics["Quiz.get_random_question [ms]"] = await median_ms(quiz.get_random_question, repeat)
+
+    quote = runner.bot.get_cog("Quote")
+    metrics["Quote.build_markov [s]"] = round(await median_ms(quote.build_markov, 1) / 1000, 3)
+
+    metrics["read log like !bot log [ms]"] = await median_ms(
+        lambda: lines_from_textfile("logs/moevius.log"), max(repeat // 4, 1)
+    )
+
+    await runner.close()
+    metrics["peak memory [MB]"] = round(peak_rss_mb(), 1)
+
+    return {
+        "scale": scale,
+        "data_mb": {path: round(size / 1024 / 1024, 2) for path, size in files.items()},
+        "metrics": metrics,
+    }
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    logging.basicConfig(level=args.log_level, force=True)
+
+    with tempfile.TemporaryDirectory(prefix="moevius-scaling-") as workdir:
+        os.chdir(workdir)
+        result = asyncio.run(measure_scale(args.worker, args.members, args.seed, args.repeat))
+        os.chdir(REPO_ROOT)
+
+    print(json.dumps(result))  # noqa: T201
+
+
+def run_scale(scale: float, args: argparse.Namespace) -> dict[str, Any]:
+    """Measures a scale in a fresh process, so the memory of one scale doesn't count for
+    the next and a scale which runs out of memory doesn't end the whole run."""
+
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.scaling",
+        "--worker",
+        str(scale),
+        "--members",
+        str(args.members),
+        "--seed",
+        str(args.seed),
+        "--repeat",
+        str(args.repeat),
+        "--log-level",
+        args.log_level,
+    ]
+
+    try:
+        process = subprocess.run(  # noqa: S603
+            command, cwd=REPO_ROOT, capture_output=True, text=True, timeout=args.timeout, check=False
+        )
+    except subprocess.TimeoutExpired:
+        return {"scale": scale, "error": f"timeout after {args.timeout:.0f} s"}
+
+    if process.returncode != 0:
+        return {"scale": scale, "error": f"exit code {process.returncode}", "stderr": process.stderr[-2000:]}
+
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    names = list(dict.fromkeys(name for result in results for name in result.get("metrics", {})))
+
+    print(f"{'scale':<36}" + "".join(f"{result['scale']:>14g}" for result in results))  # noqa: T201
+
+    for result in results:
+        if "error" in result:
+            print(f"scale {result['scale']:g} failed: {result['error']}")  # noqa: T201
+
+    for name in names:
+        values = [result.get("metrics", {}).get(name) for result in results]
+        print(f"{name:<36}" + "".join(f"{value:>14,.3f}" if value is not None else f"{'-':>14}" for value in values))  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--members", type=int, default=200, help="members of the fake guild")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="calls per command and function")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per scale")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--worker", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args)
+        return
+
+    results = []
+
+    for scale in args.scales:
+        print(f"Measuring scale {scale:g} ...", file=sys.stderr)  # noqa: T201
+        results.append(run_scale(scale, args))
+
+    print_table(results)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,29 @@
 """This module contains the bot class that inherits from discord's default bot."""
 
+import asyncio
 import logging
+import os
+import time
 
 import discord
 from discord.ext import commands
 
-from tools.json_tools import DictFile
+from tools.config_tools import Config
+from tools.history_tools import MessageHistory
+from tools.io_tools import run_io, shutdown_io_executor
+from tools.json_tools import DictFile, Persistence
+from tools.lag_tools import LoopLagMonitor
+from tools.metrics_tools import DEFAULT_EXPORT_INTERVAL, CommandMetrics
+from tools.router_tools import MessageRouter
+from tools.send_tools import Outbox
+from tools.storage_tools import STORE_NAMES, SQLiteDict, open_store
+from tools.watch_tools import FileWatcher
+
+STORE_PERSISTENCE = {
+    "faith": Persistence.WRITE_BEHIND,
+    "faith_daily": Persistence.WRITE_BEHIND,
+    "squads": Persistence.JOURNAL,
+}
 
 
 class Bot(commands.Bot):
@@ -16,16 +34,144 @@ class Bot(commands.Bot):
     def __init__(self) -> None:
         super().__init__(("!", "?"), intents=discord.Intents.all())
 
-        self.load_files_into_attrs()
+        self.config = Config()
+        self.watcher = FileWatcher()
+        self.router = MessageRouter()
+        self.history = MessageHistory()
+        self.outbox = Outbox()
+        self.metrics = CommandMetrics()
+        self.lag_monitor = LoopLagMonitor()
+        self.metrics_export: asyncio.Task | None = None
+        self.channels: dict[str, discord.TextChannel | None] = {}
+
+        self._tree_on_error = self.tree.on_error
+        self.tree.on_error = self.on_app_command_error
+
+        # The stores are opened empty and loaded together in the setup hook.
+        self.stores: dict[str, DictFile | SQLiteDict] = {
+            name: open_store(name, persistence=STORE_PERSISTENCE.get(name, Persistence.SYNC), load=False)
+            for name in STORE_NAMES
+            if name != "settings"
+        }
+        self.stores["settings"] = self.config.settings
 
         logging.info("Bot initialized!")
 
-    def load_files_into_attrs(self) -> None:
-        """This function fills the bot's attributes with data from files."""
+    @property
+    def settings(self) -> DictFile | SQLiteDict:
+        """The settings store of the config."""
 
-        self.settings = DictFile("settings")
-        self.squads = DictFile("squads")
-        self.channels: dict[str, discord.TextChannel | None] = {}
+        return self.config.settings
+
+    @property
+    def squads(self) -> DictFile | SQLiteDict:
+        return self.stores["squads"]
+
+    async def setup_hook(self) -> None:
+        self.lag_monitor.start()
+        await self.load_stores()
+        self.history.resize(self.config.history_messages_per_channel, self.config.history_max_channels)
+        await self.config.watch(self.watcher)
+        self.watcher.start()
+
+        if metrics_file := os.getenv("METRICS_FILE"):
+            interval = float(os.getenv("METRICS_INTERVAL", str(DEFAULT_EXPORT_INTERVAL)))
+            self.metrics_export = asyncio.create_task(self.metrics.export(metrics_file, interval))
+
+    async def on_message(self, message: discord.Message) -> None:
+        """Remembers the message, hands it to the router of the cogs and processes the commands."""
+
+        self.history.add(message)
+        self.router.dispatch(message, None if self.user is None else self.user.id)
+        await self.process_commands(message)
+
+    async def on_command(self, ctx: commands.Context) -> None:
+        if ctx.command is not None:
+            self.metrics.start(id(ctx), ctx.command.qualified_name)
+
+    async def on_command_completion(self, ctx: commands.Context) -> None:
+        self.metrics.finish(id(ctx))
+
+    async def on_command_error(self, ctx: commands.Context, error: commands.CommandError, /) -> None:
+        """Records the failed command. The default handler still logs errors nobody else handles."""
+
+        self.metrics.finish(id(ctx), error=True)
+        await super().on_command_error(ctx, error)
+
+    async def on_app_command_completion(
+        self, interaction: discord.Interaction, command: discord.app_commands.Command | discord.app_commands.ContextMenu
+    ) -> None:
+        """Records the app commands. Hybrid commands are already recorded as commands."""
+
+        if not isinstance(command, commands.hybrid.HybridAppCommand):
+            self.metrics.observe(command.qualified_name, self._interaction_age(interaction))
+
+    async def on_app_command_error(
+        self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError
+    ) -> None:
+        """Records the failed app commands and hands the error to the default handler."""
+
+        if interaction.command is not None and not isinstance(interaction.command, commands.hybrid.HybridAppCommand):
+            self.metrics.observe(interaction.command.qualified_name, self._interaction_age(interaction), error=True)
+
+        await self._tree_on_error(interaction, error)
+
+    @staticmethod
+    def _interaction_age(interaction: discord.Interaction) -> float:
+        return (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        if "content" in payload.data:
+            self.history.edit(payload.channel_id, payload.message_id, payload.data["content"])
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        self.history.delete(payload.channel_id, [payload.message_id])
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        self.history.delete(payload.channel_id, payload.message_ids)
+
+    async def load_stores(self) -> None:
+        """Reads every store concurrently in the I/O thread pool. The reads don't touch the
+        stores, the data is swapped in on the event loop once all reads are done."""
+
+        def read_store(store: DictFile | SQLiteDict) -> tuple[dict, int, float]:
+            start = time.perf_counter()
+            data = store.read_data()
+            return data, store.size_on_disk(), time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_io(read_store, store) for store in self.stores.values()))
+
+        for (name, store), (data, size, duration) in zip(self.stores.items(), results, strict=True):
+            store.replace_data(data)
+            logging.info("Store %s loaded in %.4f seconds. %s keys, %s bytes.", name, duration, len(data), size)
+
+        self.config.update_derived()
+
+        logging.info("All stores loaded in %.4f seconds.", time.perf_counter() - start)
+
+    async def close(self) -> None:
+        """Writes pending changes of the bot's files before closing the connection."""
+
+        self.watcher.stop()
+        self.lag_monitor.stop()
+
+        if self.metrics_export is not None:
+            self.metrics_export.cancel()
+
+        await self.outbox.drain()
+        await asyncio.gather(*(store.aclose() for store in self.stores.values()))
+
+        await super().close()
+
+        shutdown_io_executor()
+
+    async def load_files_into_attrs(self) -> None:
+        """This function reloads the squads and every file registered at the file watcher,
+        e.g. the config and the data files of the cogs."""
+
+        self.squads.replace_data(await run_io(self.squads.read_data))
+        await self.watcher.reload_all()
 
     async def analyze_guild(self) -> None:
         """This function analyzes the the channels in the discord guild
@@ -36,9 +182,9 @@ class Bot(commands.Bot):
             RuntimeError: When no guild is found.
         """
 
-        logging.info("Finding guild with ID:%s...", self.settings["server_id"])
+        logging.info("Finding guild with ID:%s...", self.config.server_id)
 
-        if (guild := self.get_guild(int(self.settings["server_id"]))) is None:
+        if (guild := self.get_guild(self.config.server_id)) is None:
             msg = "Guild not found!"
             raise RuntimeError(msg)
 
@@ -52,7 +198,7 @@ class Bot(commands.Bot):
             self.channels["stream"] = next(
                 chan
                 for chan in categories[None]
-                if chan.name == self.settings["channels"]["stream"] and chan.type == discord.ChannelType.text
+                if chan.name == self.config.stream_channel and chan.type == discord.ChannelType.text
             )
         except KeyError as err_msg:
             logging.warning("Category not found. Stream channel should be here. %s", err_msg)
@@ -60,7 +206,7 @@ class Bot(commands.Bot):
         except IndexError as err_msg:
             logging.warning(
                 "Stream channel not found. Name in settings is %s. %s",
-                self.settings["channels"]["stream"],
+                self.config.stream_channel,
                 err_msg,
             )
             self.channels["stream"] = None
@@ -2,14 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
+import csv
+import io
 import logging
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import discord
 from discord.ext import commands
 
+from tools.cache_tools import LRUCache
 from tools.check_tools import is_super_user
-from tools.json_tools import DictFile
+from tools.ledger_tools import FaithLedger, FaithReason, LedgerEntry
 
 if TYPE_CHECKING:
     from bot import Bot
@@ -17,8 +22,18 @@ if TYPE_CHECKING:
 default_fields = {
     "member": commands.parameter(description="Server Mitglied. Möglicher Input: ID, Mention, Name."),
     "points": commands.parameter(description="Menge an 🕊️-Punkten als ganze Zahl."),
+    "page": commands.parameter(default=1, description="Seite der Rangliste."),
+    "days": commands.parameter(default=7, description="Anzahl der Tage, Standard ist eine Woche."),
+    "self": commands.parameter(default=None, description="Server Mitglied, Standard bist du selbst."),
+    "role": commands.parameter(description="Rolle auf dem Server. Möglicher Input: ID, Mention, Name."),
+    "voice": commands.parameter(description="Voice Channel auf dem Server. Möglicher Input: ID, Mention, Name."),
 }
 
+PAGE_SIZE = 20
+AUTHOR_CACHE_SIZE = 4096
+REACTION_WINDOW = 2.0
+CSV_MAX_SIZE = 1024 * 1024
+
 
 async def setup(bot: Bot) -> None:
     """Setup function for the cog"""
@@ -26,65 +41,244 @@ async def setup(bot: Bot) -> None:
     logging.info("Cog loaded: Faith.")
 
 
+@dataclass
+class PendingReaction:
+    """Dataclass to collect the reaction events of one user on one message"""
+
+    channel_id: int
+    author_id: int | None = None
+    net: int = 0
+    events: int = 0
+
+
 class Faith(commands.Cog, name="Faith"):
     """This cog includes everything related to the faith mechanic"""
 
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
-        self.faith = DictFile("faith")
+        self.ledger = FaithLedger(bot.stores["faith"], bot.stores["faith_daily"])
+        self.pages: dict[int, discord.Embed] = {}
+        self.page_count = self.ledger.ranking.page_count(PAGE_SIZE)
+        self.authors: LRUCache[int, int] = LRUCache(AUTHOR_CACHE_SIZE)
+        self.pending_reactions: dict[tuple[int, int], PendingReaction] = {}
+        self._reaction_handle: asyncio.TimerHandle | None = None
+        self._reaction_flushes: set[asyncio.Task] = set()
+        self.message_handler = bot.router.register("faith.authors", self.remember_author)
+
+    async def cog_load(self) -> None:
+        await self.ledger.recover()
 
     async def cog_unload(self) -> None:
-        logging.info("Cog unloaded: Faith.")
+        self.bot.router.unregister(self.message_handler)
 
-    async def add_faith(self, member: discord.User | discord.Member, amount: int) -> None:
-        """Adds a specified amount of faith points to the specified member"""
+        if self._reaction_handle is not None:
+            self._reaction_handle.cancel()
+            self._reaction_handle = None
 
-        member_id = str(member.id)
+        if self._reaction_flushes:
+            await asyncio.gather(*self._reaction_flushes)
 
-        self.faith[member_id] = self.faith.get(member_id, 0) + amount
+        await self.flush_reactions()
+        await self.ledger.aflush()
+        self.ledger.close()
+        logging.info("Cog unloaded: Faith.")
 
-        logging.info("Faith added: %s, %s", member.name, amount)
+    async def add_faith(
+        self,
+        member: discord.User | discord.Member,
+        amount: int,
+        reason: FaithReason,
+        giver: discord.User | discord.Member | None = None,
+    ) -> None:
+        """Adds a specified amount of faith points to the specified member and records
+        the change in the ledger"""
+
+        self.invalidate_pages(self.ledger.add(str(member.id), amount, reason, None if giver is None else str(giver.id)))
+
+        logging.info("Faith added: %s, %s (%s)", member.name, amount, reason.value)
 
     async def faith_on_react(self, payload: discord.RawReactionActionEvent) -> None:
-        """Processes reaction events to grant faith points"""
+        """Collects reaction events to grant faith points. The events of a user on a message
+        are summed up for a short window, then the net changes are applied at once."""
 
         if payload.emoji.name != "Moevius":
             return
 
-        amount = self.bot.settings["faith_on_react"]
+        pending = self.pending_reactions.setdefault(
+            (payload.message_id, payload.user_id), PendingReaction(payload.channel_id)
+        )
+        pending.author_id = pending.author_id or payload.message_author_id
+        pending.net += -1 if payload.event_type == "REACTION_REMOVE" else 1
+        pending.events += 1
+
+        if self._reaction_handle is None:
+            self._reaction_handle = asyncio.get_running_loop().call_later(REACTION_WINDOW, self._start_reaction_flush)
+
+    def _start_reaction_flush(self) -> None:
+        self._reaction_handle = None
+
+        task = asyncio.create_task(self.flush_reactions())
+        self._reaction_flushes.add(task)
+        task.add_done_callback(self._reaction_flushes.discard)
+
+    async def flush_reactions(self) -> None:
+        """Applies the collected reactions. Adding and removing a reaction cancel each other
+        out for the author of the message, the user who reacted still gets a point for every
+        event, like before. All changes are written as one batch."""
 
-        if payload.event_type == "REACTION_REMOVE":
-            amount *= -1
+        pending_reactions, self.pending_reactions = self.pending_reactions, {}
+        amount = self.bot.config.faith_on_react
+        entries: list[LedgerEntry] = []
+        bonus: dict[int, int] = {}
 
-        channel = self.bot.get_channel(payload.channel_id)
+        for (message_id, user_id), pending in pending_reactions.items():
+            if not isinstance(self.bot.get_channel(pending.channel_id), discord.TextChannel):
+                continue
+
+            if pending.net != 0:
+                author_id = await self.get_message_author_id(message_id, pending.channel_id, pending.author_id)
+
+                if author_id is None:
+                    continue
+
+                entries.append(LedgerEntry(str(author_id), pending.net * amount, FaithReason.REACTION, str(user_id)))
+
+            if self.bot.get_user(user_id) is not None:
+                bonus[user_id] = bonus.get(user_id, 0) + pending.events
+
+        entries.extend(LedgerEntry(str(user_id), events, FaithReason.REACTION) for user_id, events in bonus.items())
+
+        self.invalidate_pages(self.ledger.record_many(entries))
+
+        if pending_reactions:
+            logging.info(
+                "Faith on reaction: %s reacted messages, %s ledger entries.", len(pending_reactions), len(entries)
+            )
+
+    async def get_message_author_id(self, message_id: int, channel_id: int, author_id: int | None = None) -> int | None:
+        """Finds the author of the reacted message. The author id is taken from the payload
+        or the author cache, the message is only fetched if both don't know it."""
+
+        if author_id is None:
+            author_id = self.authors.get(message_id)
+        else:
+            self.authors.put(message_id, author_id)
+
+        if author_id is not None:
+            return author_id
+
+        channel = self.bot.get_channel(channel_id)
         if not isinstance(channel, discord.TextChannel):
-            return
+            return None
+
+        try:
+            message = await channel.fetch_message(message_id)
+        except discord.HTTPException as err_msg:
+            logging.warning("Author of message %s could not be fetched. %s", message_id, err_msg)
+            return None
 
-        faith_given_to = (await channel.fetch_message(payload.message_id)).author
-        await self.add_faith(faith_given_to, amount)
+        self.authors.put(message.id, message.author.id)
 
-        if (faith_given_by := self.bot.get_user(payload.user_id)) is None:
+        logging.debug("Author of message %s fetched.", message.id)
+
+        return message.author.id
+
+    def invalidate_pages(self, positions: tuple[int, int] | None) -> None:
+        """Drops the cached pages which contain one of the given ranking positions. If the
+        number of pages changed, every page is dropped, since the footer shows it."""
+
+        if positions is None:
             return
-        await self.add_faith(faith_given_by, 1)
-
-        logging.info(
-            "Faith on reaction: %s %s %s %s🕊",
-            faith_given_by.display_name,
-            "takes" if amount <= 1 else "gives",
-            faith_given_to.display_name,
-            self.bot.settings["faith_on_react"],
+
+        if (page_count := self.ledger.ranking.page_count(PAGE_SIZE)) != self.page_count:
+            self.page_count = page_count
+            self.pages.clear()
+            return
+
+        first, last = positions
+
+        for page in range(first // PAGE_SIZE + 1, last // PAGE_SIZE + 2):
+            self.pages.pop(page, None)
+
+    def render_page(self, page: int) -> discord.Embed:
+        """Renders a page of the leaderboard. Only the members of this page are looked up."""
+
+        lines = [
+            f"{rank:>4}. {member.display_name:30}{amount:>6,d}🕊".replace(",", ".")
+            for rank, user, amount in self.ledger.ranking.page(page, PAGE_SIZE)
+            if (member := self.bot.get_user(int(user))) is not None
+        ]
+
+        embed = discord.Embed(
+            title="Die treuen Jünger des Mövius und ihre Punkte",
+            colour=discord.Colour(0xFF00FF),
+            description="```" + "\n".join(lines) + "```",
         )
+        embed.set_footer(text=f"Seite {page}/{self.ledger.ranking.page_count(PAGE_SIZE)}")
 
-    @commands.group(name="faith", brief="Wie treu sind die Jünger des Mövius.")
-    async def _faith(self, ctx: commands.Context) -> None:
-        """Zeigt alle Jünger des Mövius und ihre 🕊 an."""
+        return embed
+
+    @commands.group(name="faith", invoke_without_command=True, brief="Wie treu sind die Jünger des Mövius.")
+    async def _faith(
+        self,
+        ctx: commands.Context,
+        page: int = default_fields["page"],
+    ) -> None:
+        """Zeigt die Jünger des Mövius und ihre 🕊 an, seitenweise."""
 
         if ctx.invoked_subcommand is not None:
             return
 
+        if not 1 <= page <= self.ledger.ranking.page_count(PAGE_SIZE):
+            await ctx.send("Diese Seite gibt es nicht, Krah Krah!")
+            return
+
+        if (embed := self.pages.get(page)) is None:
+            embed = self.pages[page] = self.render_page(page)
+
+        await ctx.send(embed=embed)
+        logging.info("Faith page %s displayed.", page)
+
+    @_faith.command(name="rank", aliases=["platz"], brief="Zeigt den Rang eines Users.")
+    async def _rank_faith(
+        self,
+        ctx: commands.Context,
+        member: discord.Member | None = default_fields["self"],
+    ) -> None:
+        """Zeigt den Rang und die 🕊 eines Users an."""
+
+        user = member or ctx.author
+
+        if (rank := self.ledger.ranking.rank(str(user.id))) is None:
+            await ctx.send(f"{user.display_name} hat noch keine 🕊, Krah Krah!")
+            return
+
+        await ctx.send(
+            f"{user.display_name} ist auf Platz {rank} von {len(self.ledger.ranking)} "
+            f"mit {self.ledger.ranking.points(str(user.id))}🕊, Krah Krah!"
+        )
+
+    @_faith.command(name="top", aliases=["woche"], brief="Zeigt die 🕊️-Punkte der letzten Tage.")
+    async def _top_faith(
+        self,
+        ctx: commands.Context,
+        days: int = default_fields["days"],
+    ) -> None:
+        """Zeigt die Jünger des Mövius und ihre 🕊 der letzten Tage an."""
+
+        if days < 1:
+            await ctx.send("Mindestens einen Tag, Krah Krah!")
+            return
+
+        top = dict(list(self.ledger.leaderboard(days).items())[:PAGE_SIZE])
+        await self.send_leaderboard(ctx, top, f"Die treuesten Jünger der letzten {days} Tage")
+
+    async def send_leaderboard(self, ctx: commands.Context, points: dict[str, int], title: str) -> None:
+        """Sends the given points per member id as embed. Used for the windowed leaderboards."""
+
         members = {
             member.display_name: amount
-            for user, amount in sorted(self.faith.items(), key=lambda item: item[1], reverse=True)
+            for user, amount in points.items()
             if (member := self.bot.get_user(int(user))) is not None
         }
 
@@ -102,7 +296,7 @@ class Faith(commands.Cog, name="Faith"):
 
         await ctx.send(
             embed=discord.Embed(
-                title="Die treuen Jünger des Mövius und ihre Punkte",
+                title=title,
                 colour=discord.Colour(0xFF00FF),
                 description=output,
             )
@@ -121,7 +315,7 @@ class Faith(commands.Cog, name="Faith"):
 
         logging.info("Manual faith added by %s", ctx.author.name)
 
-        await self.add_faith(member, amount)
+        await self.add_faith(member, amount, FaithReason.MANUAL, ctx.author)
 
         await ctx.send(f"Alles klar, {member.display_name} hat {amount}🕊 erhalten, Krah Krah!")
 
@@ -136,7 +330,7 @@ class Faith(commands.Cog, name="Faith"):
         """Entfernt einem User 🕊️-Punkte."""
 
         logging.info("Manual faith removed by %s", ctx.author.name)
-        await self.add_faith(member, amount * (-1))
+        await self.add_faith(member, amount * (-1), FaithReason.MANUAL, ctx.author)
 
         await ctx.send(f"Alles klar, {member.display_name} wurden {amount}🕊 abgezogen, Krah Krah!")
 
@@ -155,10 +349,123 @@ class Faith(commands.Cog, name="Faith"):
         """Setzt die 🕊️-Punkte eines Users auf einen bestimmten Wert."""
 
         logging.info("Manual faith set by %s", ctx.author.name)
-        self.faith.update({str(member.id): amount})
+        self.invalidate_pages(self.ledger.set_balance(str(member.id), amount, str(ctx.author.id)))
 
         await ctx.send(f"Alles klar, {member.display_name} hat nun {amount}🕊, Krah Krah!")
 
+    async def add_faith_batch(self, ctx: commands.Context, members: list[discord.Member], amount: int) -> int:
+        """Adds the amount of faith points to every member, except bots, as one batch and
+        writes the changes right away.
+
+        Returns:
+            int: Number of members who got the points."""
+
+        entries = [
+            LedgerEntry(str(member.id), amount, FaithReason.MANUAL, str(ctx.author.id))
+            for member in members
+            if not member.bot
+        ]
+
+        self.invalidate_pages(self.ledger.record_many(entries))
+        await self.ledger.aflush()
+
+        return len(entries)
+
+    @is_super_user()
+    @_faith.command(name="add-role", brief="Gibt allen Mitgliedern einer Rolle 🕊️-Punkte.")
+    async def _add_faith_role(
+        self,
+        ctx: commands.Context,
+        role: discord.Role = default_fields["role"],
+        amount: int = default_fields["points"],
+    ) -> None:
+        """Gibt allen Mitgliedern einer Rolle 🕊️-Punkte."""
+
+        count = await self.add_faith_batch(ctx, role.members, amount)
+
+        logging.info("Manual faith added to role %s by %s. %s members.", role.name, ctx.author.name, count)
+        await ctx.send(f"Alles klar, {count} Mitglieder von {role.name} haben je {amount}🕊 erhalten, Krah Krah!")
+
+    @is_super_user()
+    @_faith.command(name="add-voice", brief="Gibt allen Mitgliedern in einem Voice Channel 🕊️-Punkte.")
+    async def _add_faith_voice(
+        self,
+        ctx: commands.Context,
+        channel: discord.VoiceChannel = default_fields["voice"],
+        amount: int = default_fields["points"],
+    ) -> None:
+        """Gibt allen Mitgliedern, die gerade in einem Voice Channel sind, 🕊️-Punkte."""
+
+        count = await self.add_faith_batch(ctx, channel.members, amount)
+
+        logging.info("Manual faith added to voice %s by %s. %s members.", channel.name, ctx.author.name, count)
+        await ctx.send(f"Alles klar, {count} Mitglieder in {channel.name} haben je {amount}🕊 erhalten, Krah Krah!")
+
+    @is_super_user()
+    @_faith.command(name="export", brief="Exportiert alle 🕊️-Punkte als CSV-Datei.")
+    async def _export_faith(self, ctx: commands.Context) -> None:
+        """Exportiert alle 🕊️-Punkte als CSV-Datei mit den Spalten member_id, name und points."""
+
+        with io.StringIO() as output:
+            writer = csv.writer(output)
+            writer.writerow(["member_id", "name", "points"])
+            writer.writerows(
+                [
+                    member_id,
+                    "" if (user := self.bot.get_user(int(member_id))) is None else user.display_name,
+                    points,
+                ]
+                for member_id, points in self.ledger.ranking.items()
+            )
+
+            data = output.getvalue().encode("utf-8")
+
+        logging.info("Faith exported by %s. %s members.", ctx.author.name, len(self.ledger.ranking))
+        await ctx.send(
+            f"Hier sind die 🕊️-Punkte von {len(self.ledger.ranking)} Jüngern, Krah Krah!",
+            file=discord.File(io.BytesIO(data), filename="faith.csv"),
+        )
+
+    @is_super_user()
+    @_faith.command(name="import", brief="Setzt die 🕊️-Punkte aus einer CSV-Datei.")
+    async def _import_faith(self, ctx: commands.Context) -> None:
+        """Setzt die 🕊️-Punkte aller Jünger aus der angehängten CSV-Datei. Sie braucht die
+        Spalten member_id und points, z.B. aus !faith export. Andere Jünger bleiben unverändert."""
+
+        if not ctx.message.attachments:
+            await ctx.send("Bitte hänge eine CSV-Datei an, Krah Krah!")
+            return
+
+        if (attachment := ctx.message.attachments[0]).size > CSV_MAX_SIZE:
+            await ctx.send("Die Datei ist zu groß, Krah Krah!")
+            return
+
+        balances: dict[str, int] = {}
+        skipped = 0
+
+        try:
+            rows = csv.DictReader(io.StringIO((await attachment.read()).decode("utf-8-sig")))
+
+            for row in rows:
+                try:
+                    balances[str(int(row["member_id"]))] = int(row["points"])
+                except (KeyError, TypeError, ValueError):
+                    skipped += 1
+        except (UnicodeDecodeError, csv.Error) as err_msg:
+            await ctx.send("Die Datei konnte nicht gelesen werden, Krah Krah!")
+            logging.warning("Faith import failed. %s", err_msg)
+            return
+
+        self.invalidate_pages(self.ledger.set_balances(balances, str(ctx.author.id)))
+        await self.ledger.aflush()
+
+        logging.info("Faith imported by %s. %s members, %s rows skipped.", ctx.author.name, len(balances), skipped)
+        await ctx.send(
+            f"Alles klar, die 🕊️-Punkte von {len(balances)} Jüngern wurden gesetzt"
+            + (f", {skipped} Zeilen übersprungen" if skipped else "")
+            + ", Krah Krah!"
+        )
+
     @commands.Cog.listener()
     async def on_command_completion(self, ctx: commands.Context) -> None:
         """Checks wether the completed command is in the faith_by_command-list
@@ -167,15 +474,30 @@ class Faith(commands.Cog, name="Faith"):
         if ctx.command is None:
             return
 
-        if ctx.command.qualified_name not in self.bot.settings["faith_by_command"]:
+        if ctx.command.qualified_name not in self.bot.config.faith_by_command:
             logging.warning("Command %s not in Settings.", ctx.command.qualified_name)
             return
 
         logging.info("Faith will be added for command: %s", ctx.command.qualified_name)
 
-        amount: int = self.bot.settings["faith_by_command"][ctx.command.qualified_name]
+        amount = self.bot.config.faith_by_command[ctx.command.qualified_name]
+
+        await self.add_faith(ctx.author, amount, FaithReason.COMMAND)
+
+    @is_super_user()
+    @_faith.command(name="cache", brief="Zeigt die Statistik des Autoren-Caches.")
+    async def _cache_stats(self, ctx: commands.Context) -> None:
+        """Zeigt Größe, Treffer und Fehlschläge des Caches für die Autoren der Nachrichten."""
+
+        await ctx.send(
+            f"Autoren-Cache: {len(self.authors)}/{self.authors.maxsize} Einträge, "
+            f"{self.authors.hits} Treffer, {self.authors.misses} Fehlschläge "
+            f"({self.authors.hit_rate:.1%}), Krah Krah!"
+        )
 
-        await self.add_faith(ctx.author, amount)
+    async def remember_author(self, message: discord.Message) -> None:
+        """Remembers the author of every message for the reactions."""
+        self.authors.put(message.id, message.author.id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
@@ -7,18 +7,23 @@ import math
 import random
 import re
 from enum import Enum
+from functools import partial
 from typing import TYPE_CHECKING
 
 import discord
 from bs4 import BeautifulSoup
 from discord.ext import commands
 
-from tools.json_tools import DictFile
+from tools.io_tools import run_io
+from tools.matcher_tools import TriggerMatcher
 from tools.request_tools import async_request_html
+from tools.storage_tools import SQLiteDict
+from tools.template_tools import Response, compile_responses
 from tools.textfile_tools import lines_from_textfile
 
 if TYPE_CHECKING:
     from bot import Bot
+    from tools.watch_tools import WatchedFile
 
 
 class ListType(Enum):
@@ -45,19 +50,60 @@ class Misc(commands.Cog, name="Sonstiges"):
         self.bot = bot
         self.fragen: list[str] = []
         self.bible: list[str] = []
-        self.responses = DictFile("responses")
+        self.responses = bot.stores["responses"]
+        self.requests, self.triggers, self.matcher = self._compile_responses(self.responses)
+        self.watched_files: list[WatchedFile] = []
+        self.message_handler = bot.router.register("misc.responses", self.respond, ignore_self=True)
 
     async def cog_unload(self) -> None:
+        self.bot.router.unregister(self.message_handler)
+
+        for watched_file in self.watched_files:
+            self.bot.watcher.unwatch(watched_file)
+
         logging.info("Cog unloaded: Misc.")
 
     async def load_all_lists_from_file(self) -> None:
-        """Asynchronously loading the files for fragen and bible into their corresponding lists."""
-
-        self.fragen = await lines_from_textfile("fragen.txt")
-        self.bible = await lines_from_textfile("moevius-bibel.txt")
+        """Registers the files for fragen, bible and responses at the file watcher. They are
+        loaded right away and again whenever they change, so commands only read memory."""
+
+        self.watched_files = [
+            await self.bot.watcher.watch("fragen.txt", partial(lines_from_textfile, "fragen.txt"), self._set_fragen),
+            await self.bot.watcher.watch(
+                "moevius-bibel.txt", partial(lines_from_textfile, "moevius-bibel.txt"), self._set_bible
+            ),
+            await self.bot.watcher.watch(
+                self.responses.file_name,
+                partial(run_io, self._load_responses),
+                self._set_responses,
+                load_now=False,
+                poll=not isinstance(self.responses, SQLiteDict),
+            ),
+        ]
 
         logging.info("Files loaded. Fragen: %s - Bible: %s", len(self.fragen), len(self.bible))
 
+    @staticmethod
+    def _compile_responses(data: dict) -> tuple[dict[str, Response], dict[str, Response], TriggerMatcher]:
+        triggers = compile_responses(data.get("res", {}))
+        return compile_responses(data.get("req", {})), triggers, TriggerMatcher(triggers)
+
+    def _load_responses(self) -> tuple[dict, tuple[dict[str, Response], dict[str, Response], TriggerMatcher]]:
+        data = self.responses.read_data()
+        return data, self._compile_responses(data)
+
+    def _set_responses(
+        self, loaded: tuple[dict, tuple[dict[str, Response], dict[str, Response], TriggerMatcher]]
+    ) -> None:
+        self.responses.replace_data(loaded[0])
+        self.requests, self.triggers, self.matcher = loaded[1]
+
+    def _set_fragen(self, lines: list[str]) -> None:
+        self.fragen = lines
+
+    def _set_bible(self, lines: list[str]) -> None:
+        self.bible = lines
+
     @commands.command(
         name="ps5",
         brief="Vergleicht die erste Zahl aus der vorherigen Nachricht mit dem  Preis einer PS5.",
@@ -65,9 +111,11 @@ class Misc(commands.Cog, name="Sonstiges"):
     async def _ps5(self, ctx: commands.Context) -> None:
         """Vergleicht die erste Zahl aus der vorherigen Nachricht mit dem  Preis einer PS5."""
 
-        message = [msg async for msg in ctx.channel.history(limit=2)][1].content
+        if (previous := await self.bot.history.previous(ctx.message)) is None:
+            logging.error("No previous message found!")
+            return
 
-        if (re_match := re.search(r"\d+(,\d+)?", message)) is None:
+        if (re_match := re.search(r"\d+(,\d+)?", previous.content)) is None:
             logging.error("No number found in message!")
             return
 
@@ -109,14 +157,14 @@ class Misc(commands.Cog, name="Sonstiges"):
 
             case ListType.QUESTION:
                 if not self.fragen:
-                    self.fragen = await lines_from_textfile("fragen.txt")
+                    return None
 
                 description = random.SystemRandom().choice(self.fragen)
                 title = f"Frage an {ctx.author.display_name}"
 
             case ListType.BIBLE:
                 if not self.bible:
-                    self.fragen = await lines_from_textfile("moevius-bibel.txt")
+                    return None
 
                 description = random.SystemRandom().choice(self.bible)
                 title = "Das Wort unseres Herrn, Krah Krah!"
@@ -155,25 +203,20 @@ class Misc(commands.Cog, name="Sonstiges"):
 
         await ctx.send("Die Ult ist aktuell deaktiviert, bitte bleiben Sie in der Leitung, Krah Krah!")
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
+    async def respond(self, message: discord.Message) -> None:
         """Listens for words in the responses-file and replies as defined."""
 
-        if message.author == self.bot.user:
-            return
-
         # Requests from file
-        if message.content[1:] in self.responses["req"]:
-            response = self.responses["req"][message.content[1:]]
-            for res in response["res"]:
-                await message.channel.send(res.format(**locals(), **globals()))
-            logging.info(response["log"].format(**locals(), **globals()))
+        if (response := self.requests.get(message.content[1:])) is not None:
+            for text in response.texts:
+                self.bot.outbox.send(message.channel, text.render(message), merge=True)
+            logging.info(response.log.render(message))
 
         # Responses from file
         else:
-            for key in self.responses["res"]:
-                if re.search(key, message.content):
-                    response = self.responses["res"][key]
-                    for res in response["res"]:
-                        await message.channel.send(content=res.format(**locals(), **globals()), tts=False)
-                    logging.info(response["log"].format(**locals(), **globals()))
+            for key in self.matcher.match(message.content):
+                response = self.triggers[key]
+                match = self.matcher.patterns[key].search(message.content) if response.uses_match else None
+                for text in response.texts:
+                    self.bot.outbox.send(message.channel, text.render(message, match), merge=True)
+                logging.info(response.log.render(message, match))
@@ -5,22 +5,27 @@ from __future__ import annotations
 import logging
 import random
 from enum import Enum
-from pathlib import Path
+from functools import partial
 from typing import TYPE_CHECKING
 
 import discord
 from discord.ext import commands
 
 from tools.check_tools import is_super_user
-from tools.json_tools import load_file, save_file
+from tools.json_tools import async_load_file
+from tools.textfile_tools import lines_append_to_textfile
 
 if TYPE_CHECKING:
     from bot import Bot
+    from tools.watch_tools import WatchedFile
 
 
 async def setup(bot: Bot) -> None:
     """Setup function for the cog."""
-    await bot.add_cog(Quiz(bot))
+
+    quiz_cog = Quiz(bot)
+    await quiz_cog.watch_quiz_file()
+    await bot.add_cog(quiz_cog)
     logging.info("Cog: Quiz geladen.")
 
 
@@ -45,6 +50,9 @@ class Quiz(commands.Cog, name="Quiz"):
         self.game_stage: int = 0
         self.question: dict[str, dict] = {}
         self.quiz: list | None = None
+        self.ranking = bot.stores["quiz_ranking"]
+        self.watched_file: WatchedFile | None = None
+        self.message_handler = bot.router.register("quiz.answers", self.answer, predicate=self.is_answer)
 
         self.stages = [
             50,
@@ -67,6 +75,30 @@ class Quiz(commands.Cog, name="Quiz"):
 
         logging.debug("Game-Stages geladen.")
 
+    async def cog_unload(self) -> None:
+        self.bot.router.unregister(self.message_handler)
+
+        if self.watched_file is not None:
+            self.bot.watcher.unwatch(self.watched_file)
+
+        logging.info("Cog unloaded: Quiz.")
+
+    async def watch_quiz_file(self) -> None:
+        """Registers the quiz file at the file watcher. It is loaded right away and again
+        whenever it changes, so starting a quiz doesn't read the file."""
+
+        self.watched_file = await self.bot.watcher.watch(
+            "json/quiz.json", partial(async_load_file, "json/quiz.json"), self._set_quiz
+        )
+
+    def _set_quiz(self, quiz: dict | list) -> None:
+        if not isinstance(quiz, list):
+            logging.error("Quiz data formatted wrong.")
+            return
+
+        self.quiz = quiz
+        logging.info("Quiz loaded. %s questions.", len(quiz))
+
     async def get_random_question(self) -> None:
         """_summary_"""
 
@@ -117,10 +149,10 @@ class Quiz(commands.Cog, name="Quiz"):
             return
 
         if self.question["answers"][user_answer]["correct"]:
-            await self.channel.send("✅ Richtig!\n")
+            self.bot.outbox.send(self.channel, "✅ Richtig!\n")
 
             if self.game_stage == CheckPoint.THIRD:
-                await self.channel.send(f"Du hast {self.stages[15]}🕊 gewonnen!!!")
+                self.bot.outbox.send(self.channel, f"Du hast {self.stages[15]}🕊 gewonnen!!!")
 
                 await self.update_ranking(self.stages[15])
                 await self.stop_quiz()
@@ -128,7 +160,7 @@ class Quiz(commands.Cog, name="Quiz"):
                 return
 
             if self.game_stage in [CheckPoint.FIRST, CheckPoint.SECOND]:
-                await self.channel.send(f"❗️ Checkpoint erreicht: {self.stages[self.game_stage]}🕊.")
+                self.bot.outbox.send(self.channel, f"❗️ Checkpoint erreicht: {self.stages[self.game_stage]}🕊.")
 
             self.game_stage += 1
 
@@ -140,23 +172,25 @@ class Quiz(commands.Cog, name="Quiz"):
             ):
                 return
 
-            await self.channel.send(content=output["content"], embed=output["embed"])
+            self.bot.outbox.send(self.channel, output["content"], embed=output["embed"])
 
         else:
-            await self.channel.send("❌ Falsch!")
+            self.bot.outbox.send(self.channel, "❌ Falsch!")
 
             correct_answer = next(answer for answer in self.question["answers"].items() if answer[1]["correct"])
 
-            await self.channel.send(f"Die richtige Antwort ist {correct_answer[0]}: {correct_answer[1]['text']}")
+            self.bot.outbox.send(
+                self.channel, f"Die richtige Antwort ist {correct_answer[0]}: {correct_answer[1]['text']}"
+            )
 
             if self.game_stage <= CheckPoint.FIRST:
-                await self.channel.send("Du verlässt das Spiel ohne Gewinn.")
+                self.bot.outbox.send(self.channel, "Du verlässt das Spiel ohne Gewinn.")
                 await self.update_ranking(0)
             elif self.game_stage > CheckPoint.SECOND:
-                await self.channel.send(f"Du verlässt das Spiel mit {self.stages[9]}🕊.")
+                self.bot.outbox.send(self.channel, f"Du verlässt das Spiel mit {self.stages[9]}🕊.")
                 await self.update_ranking(self.stages[9])
             elif self.game_stage > CheckPoint.FIRST:
-                await self.channel.send(f"Du verlässt das Spiel mit {self.stages[4]}🕊.")
+                self.bot.outbox.send(self.channel, f"Du verlässt das Spiel mit {self.stages[4]}🕊.")
                 await self.update_ranking(self.stages[4])
 
             await self.stop_quiz()
@@ -179,19 +213,16 @@ class Quiz(commands.Cog, name="Quiz"):
 
         player_id = str(self.player.id)
 
-        ranking = load_file("json/quiz_ranking.json")
-
-        if not isinstance(ranking, dict):
+        if player_id not in self.ranking:
+            self.ranking[player_id] = {"name": self.player.display_name, "points": amount, "tries": 1}
             return
 
-        if player_id not in ranking:
-            ranking[player_id] = {"name": self.player.display_name, "points": amount, "tries": 1}
-        else:
-            ranking[player_id]["name"] = self.player.display_name
-            ranking[player_id]["points"] = ranking[player_id].get("points") + amount
-            ranking[player_id]["tries"] = ranking[player_id].get("tries") + 1
+        entry = self.ranking[player_id]
+        entry["name"] = self.player.display_name
+        entry["points"] = entry.get("points") + amount
+        entry["tries"] = entry.get("tries") + 1
 
-        save_file("json/quiz_ranking.json", ranking)
+        self.ranking[player_id] = entry
 
     @commands.group(name="quiz", brief="Startet eine Quiz Runde")
     async def _quiz(self, ctx: commands.Context) -> None:
@@ -210,17 +241,15 @@ class Quiz(commands.Cog, name="Quiz"):
         if not isinstance(ctx.author, discord.Member) or not isinstance(ctx.channel, discord.TextChannel):
             return
 
+        if not self.quiz:
+            await ctx.send("Die Fragen für das Quiz konnten nicht geladen werden, Krah Krah!")
+            logging.error("Quiz data not loaded.")
+            return
+
         self.player = ctx.author
         self.channel = ctx.channel
         self.game_stage = 0
 
-        quiz = load_file("json/quiz.json")
-
-        if not isinstance(quiz, list):
-            return
-
-        self.quiz = quiz
-
         await ctx.send(
             "Hallo und herzlich Willkommen zu Wer Wird Mövionär! "
             f"Heute mit dabei: {self.player.display_name}."
@@ -255,8 +284,9 @@ class Quiz(commands.Cog, name="Quiz"):
         usage="report <Grund>",
     )
     async def _report(self, ctx: commands.Context, *args: str) -> None:
-        with Path("logs/quiz_report.log").open("a+", encoding="utf-8") as file:  # noqa: ASYNC230
-            file.write(f"Grund: {' '.join(args)} - Frage: {self.question['question']}\n")
+        await lines_append_to_textfile(
+            "logs/quiz_report.log", [f"Grund: {' '.join(args)} - Frage: {self.question['question']}"]
+        )
 
         await ctx.send("Deine Meldung wurde abgeschickt.")
 
@@ -275,16 +305,11 @@ class Quiz(commands.Cog, name="Quiz"):
         if self.channel is None:
             return
 
-        await self.channel.send(content=output["content"], embed=output["embed"])
+        self.bot.outbox.send(self.channel, output["content"], embed=output["embed"])
 
     @_quiz.command(name="rank", brief="Zeigt das Leaderboard an.")
     async def _rank(self, ctx: commands.Context) -> None:
-        ranking = load_file("json/quiz_ranking.json")
-
-        if not isinstance(ranking, dict):
-            return
-
-        sorted_ranking = dict(sorted(ranking.items(), key=lambda item: item[1]["points"], reverse=True))
+        sorted_ranking = dict(sorted(self.ranking.items(), key=lambda item: item[1]["points"], reverse=True))
 
         broken_users = []
         max_length = {"name": 0, "points": 0}
@@ -324,19 +349,18 @@ class Quiz(commands.Cog, name="Quiz"):
             )
         )
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """_summary_
+    def is_answer(self, message: discord.Message) -> bool:
+        """Only messages of the player in the channel of a running quiz are answers."""
+
+        return self.channel is not None and self.player == message.author and message.channel == self.channel
+
+    async def answer(self, message: discord.Message) -> None:
+        """Checks the answer of the player or lets them quit the quiz.
 
         Args:
-            message (discord.Message): _description_
+            message (discord.Message): Message of the player in the quiz channel.
         """
-        if (
-            self.channel is None
-            or self.player != message.author
-            or message.channel != self.channel
-            or not isinstance(self.question["answers"], dict)
-        ):
+        if self.channel is None or not isinstance(self.question["answers"], dict):
             return
 
         user_answer = message.content.title()
@@ -346,13 +370,14 @@ class Quiz(commands.Cog, name="Quiz"):
                 await self.check_answer(user_answer)
 
             case "Q":
-                await self.channel.send(
+                self.bot.outbox.send(
+                    self.channel,
                     "Du verlässt das Spiel "
                     + (
                         "ohne Gewinn."
                         if self.game_stage == 0
                         else f"freiwillig mit {self.stages[self.game_stage - 1]}🕊."
-                    )
+                    ),
                 )
 
                 if self.game_stage == 0:
@@ -362,6 +387,8 @@ class Quiz(commands.Cog, name="Quiz"):
 
                 correct_answer = next(answer for answer in self.question["answers"].items() if answer[1]["correct"])
 
-                await self.channel.send(f"Die richtige Antwort ist {correct_answer[0]}: {correct_answer[1]['text']}")
+                self.bot.outbox.send(
+                    self.channel, f"Die richtige Antwort ist {correct_answer[0]}: {correct_answer[1]['text']}"
+                )
 
                 await self.stop_quiz()
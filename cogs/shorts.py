@@ -2,15 +2,14 @@
 
 import datetime as dt
 import logging
-import os
 import random
 
 import aiohttp
 from discord.ext import commands
-from dotenv import load_dotenv
 
 from bot import Bot
 from tools.check_tools import is_super_user
+from tools.config_tools import Config
 from tools.dt_tools import get_local_timezone
 
 cog_info = {
@@ -49,15 +48,10 @@ async def setup(bot: Bot) -> None:
 
 
 class YTClipsHandler:
-    def __init__(self, *, channel_handle: str) -> None:
+    def __init__(self, config: Config, *, channel_handle: str) -> None:
         logging.info("Initializing YT Shorts handler for channel @%s...", channel_handle)
 
-        if not load_dotenv():
-            err_msg = "No .env file found!"
-            logging.exception(err_msg)
-            raise OSError(err_msg)
-
-        self.yt_api_key = str(os.getenv("YT_API_KEY"))
+        self.yt_api_key = config.get_secret("YT_API_KEY")
 
         self.channel_handle = channel_handle
         self.channel_id = ""
@@ -200,7 +194,7 @@ class Shorts(commands.Cog, **cog_info["cog"]):
     def __init__(self, bot: Bot, *, channel_handle: str = "schnenko6263") -> None:
         logging.info("Initializing YT Shorts cog...")
         self.bot = bot
-        self.clip_handler = YTClipsHandler(channel_handle=channel_handle)
+        self.clip_handler = YTClipsHandler(bot.config, channel_handle=channel_handle)
         logging.info("Initialized YT Shorts cog.")
 
     async def cog_unload(self) -> None:
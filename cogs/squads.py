@@ -128,7 +128,9 @@ class Squads(commands.Cog):
                 )
                 continue
 
-            self.bot.squads[ctx.channel.name][member.name] = member.id
+            squad = self.bot.squads[ctx.channel.name]
+            squad[member.name] = member.id
+            self.bot.squads[ctx.channel.name] = squad
             await ctx.send(f"{member.name} wurde zum Squad hinzugefügt, Krah Krah!")
             logging.info(
                 "%s hat %s zum %s-Squad hinzugefügt.",
@@ -170,7 +172,9 @@ class Squads(commands.Cog):
                 )
                 continue
 
-            self.bot.squads[ctx.channel.name].pop(member.name)
+            squad = self.bot.squads[ctx.channel.name]
+            squad.pop(member.name)
+            self.bot.squads[ctx.channel.name] = squad
             await ctx.send(f"{member.name} wurde aus dem Squad entfernt, Krah Krah!")
             logging.info(
                 "%s hat %s aus dem %s-Squad entfernt.",
@@ -2,15 +2,14 @@
 
 import datetime as dt
 import logging
-import os
 import random
 
 import aiohttp
 from discord.ext import commands
-from dotenv import load_dotenv
 
 from bot import Bot
 from tools.check_tools import is_super_user
+from tools.config_tools import Config
 from tools.dt_tools import get_local_timezone
 
 cog_info = {
@@ -49,16 +48,11 @@ async def setup(bot: Bot) -> None:
 
 
 class TwitchTokenHandler:
-    def __init__(self) -> None:
+    def __init__(self, config: Config) -> None:
         logging.info("Initializing Twitch token handler...")
 
-        if not load_dotenv():
-            err_msg = "No .env file found!"
-            logging.exception(err_msg)
-            raise OSError(err_msg)
-
-        self.client_id = str(os.getenv("TWITCH_CLIENT_ID"))
-        self.client_secret = str(os.getenv("TWITCH_CLIENT_SECRET"))
+        self.client_id = config.get_secret("TWITCH_CLIENT_ID")
+        self.client_secret = config.get_secret("TWITCH_CLIENT_SECRET")
 
         self.token = ""
         self.expire_dt = dt.datetime.now(tz=get_local_timezone())
@@ -77,17 +71,11 @@ class TwitchTokenHandler:
         """Fetches twitch token for API requests.
 
         Raises:
-            OSError: No .env file found!
             OSError: Twitch API responded with status code 400 or above
             OSError: Faulty Response from Twitch: Missing access token!"""
 
         logging.info("Fetching Twitch token ...")
 
-        if not load_dotenv():
-            err_msg = "No .env file found!"
-            logging.exception(err_msg)
-            raise OSError(err_msg)
-
         async with (
             aiohttp.ClientSession() as session,
             session.post(
@@ -122,9 +110,9 @@ class TwitchTokenHandler:
 
 
 class TwitchClipsHandler:
-    def __init__(self, *, broadcaster_name: str) -> None:
+    def __init__(self, config: Config, *, broadcaster_name: str) -> None:
         logging.info("Initializing Twitch clip handler for broadcaster %s...", broadcaster_name)
-        self.token_handler = TwitchTokenHandler()
+        self.token_handler = TwitchTokenHandler(config)
 
         self.broadcaster_name = broadcaster_name
         self.broadcaster_id = ""
@@ -260,7 +248,7 @@ class Twitch(commands.Cog, **cog_info["cog"]):
     def __init__(self, bot: Bot, *, broadcaster_name: str = "schnenko") -> None:
         logging.info("Initializing Twitch cog...")
         self.bot = bot
-        self.clip_handler = TwitchClipsHandler(broadcaster_name=broadcaster_name)
+        self.clip_handler = TwitchClipsHandler(bot.config, broadcaster_name=broadcaster_name)
         logging.info("Initialized Twitch cog.")
 
     async def cog_unload(self) -> None:
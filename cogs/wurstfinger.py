@@ -61,10 +61,12 @@ class Wurstfinger(commands.Cog, name="Wurstfinger"):
 
     @commands.command(name="schnenk", aliases=["Schnenk"])
     async def _schnenk(self, ctx: commands.Context, percent: int = 5) -> None:
-        with io.StringIO() as output:
-            message = [message async for message in ctx.channel.history(limit=2)][1].content
+        if (previous := await self.bot.history.previous(ctx.message)) is None:
+            logging.error("No previous message found!")
+            return
 
-            for character in message:
+        with io.StringIO() as output:
+            for character in previous.content:
                 char = character
                 if char.isdecimal():
                     output.write(char)
@@ -85,7 +87,11 @@ class Wurstfinger(commands.Cog, name="Wurstfinger"):
 
     @commands.command(name="wurstfinger")
     async def _wurstfinger(self, ctx: commands.Context) -> None:
-        message = [msg async for msg in ctx.channel.history(limit=2)][1].content
+        if (previous := await self.bot.history.previous(ctx.message)) is None:
+            logging.error("No previous message found!")
+            return
+
+        message = previous.content
         correction = self.speller(message)
 
         await ctx.send(f"Meintest du vielleicht: {correction}")
@@ -1,22 +1,24 @@
 """Main file of the Moevius Discord Bot"""
 
+import argparse
 import datetime as dt
 import io
 import logging
-import os
 import sys
 from asyncio import gather, run, subprocess
 from pathlib import Path
 
 import discord
+import yarl
 from discord.abc import GuildChannel
 from discord.ext import commands
-from dotenv import load_dotenv
 
 from bot import Bot
 from tools.check_tools import SpecialUser, is_super_user
+from tools.config_tools import MissingSecretError
 from tools.dt_tools import get_local_timezone, strfdelta
 from tools.logger_tools import LoggerTools
+from tools.profile_tools import MAX_PROFILE_SECONDS, ProfilerBusyError, profile_loop
 from tools.py_version_tools import check_python_version
 from tools.textfile_tools import lines_from_textfile
 
@@ -195,12 +197,122 @@ class Administration(commands.Cog, name="Administration"):
 
         await ctx.send(f"Uptime: {uptime_str} seit {STARTUP_TIME.strftime('%Y.%m.%d %H:%M:%S')}")
 
+    @_bot.command(name="stats")
+    async def _command_stats(self, ctx: commands.Context) -> None:
+        """Zeigt, wie oft die Befehle seit dem Start benutzt wurden, wie lange sie gebraucht haben
+        und wie oft sie fehlgeschlagen sind."""
+
+        metrics = self.bot.metrics
+
+        with io.StringIO() as output:
+            output.write(f"{metrics.in_flight} Befehle laufen gerade.\n```")
+            output.write(f"{'Befehl':<20}{'Anzahl':>7}{'Fehler':>7}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}\n")
+
+            for stats in sorted(metrics.commands.values(), key=lambda stats: stats.count, reverse=True)[:25]:
+                output.write(
+                    f"{stats.name[:19]:<20}{stats.count:>7}{stats.errors:>7}{stats.quantile(0.5) * 1000:>9.0f}"
+                    f"{stats.quantile(0.95) * 1000:>9.0f}{stats.max_seconds * 1000:>9.0f}\n"
+                )
+
+            output.write("```Krah Krah!")
+
+            await ctx.send(output.getvalue())
+
+    @is_super_user()
+    @_bot.command(name="lag")
+    async def _loop_lag(self, ctx: commands.Context) -> None:
+        """Zeigt, wie stark die Event-Loop seit dem Start verzögert wurde und welche Funktionen sie
+        am längsten blockiert haben."""
+
+        monitor = self.bot.lag_monitor
+
+        with io.StringIO() as output:
+            output.write(
+                f"Verzögerung: {monitor.average_lag * 1000:.1f} ms im Schnitt, {monitor.max_lag * 1000:.0f} ms "
+                f"maximal, {monitor.stalls} mal über {monitor.threshold * 1000:.0f} ms.\n```"
+            )
+
+            offenders = sorted(monitor.offenders.values(), key=lambda offender: offender.seconds, reverse=True)
+
+            for offender in offenders[:10]:
+                output.write(
+                    f"{offender.name[:40]:<41}{offender.count:>5}x{offender.seconds * 1000:>9.0f} ms"
+                    f"{offender.max_seconds * 1000:>8.0f} ms max\n"
+                )
+
+            if not offenders:
+                output.write("Bisher hat nichts die Loop blockiert.\n")
+
+            output.write("```Krah Krah!")
+
+            await ctx.send(output.getvalue())
+
+    @is_super_user()
+    @_bot.command(name="profile")
+    async def _profile(self, ctx: commands.Context, seconds: float = 10.0, top: int = 15) -> None:
+        """Misst für ein paar Sekunden (höchstens 60) alles, was auf der Event-Loop läuft. Danach
+        werden die Funktionen mit der größten kumulierten Zeit gezeigt und die vollständigen
+        Daten als .prof-Datei angehängt, z.B. für pstats oder snakeviz."""
+
+        await ctx.send(f"Profiler läuft für {min(seconds, MAX_PROFILE_SECONDS):g} Sekunden, Krah Krah!")
+
+        try:
+            result = await profile_loop(seconds)
+        except ProfilerBusyError:
+            await ctx.send("Der Profiler läuft schon, Krah Krah!")
+            return
+
+        with io.StringIO() as output:
+            output.write(
+                f"{result.calls:,} Aufrufe in {result.seconds:.1f} s, geschätzter Overhead "
+                f"{result.overhead_seconds * 1000:.0f} ms ({result.overhead_share:.1%}).\n```"
+            )
+
+            output.write(f"{'Funktion':<41}{'Aufrufe':>8}{'eigen s':>8}{'kum. s':>8}\n")
+
+            for name, calls, own, cumulative in result.top(min(max(top, 1), 25)):
+                output.write(f"{name[-40:]:<41}{calls:>8}{own:>8.3f}{cumulative:>8.3f}\n")
+
+            output.write("```")
+
+            await ctx.send(
+                output.getvalue(),
+                file=discord.File(
+                    io.BytesIO(result.dumps()),
+                    filename=f"profile_{dt.datetime.now(tz=get_local_timezone()):%Y_%m_%d_%H_%M_%S}.prof",
+                ),
+            )
+
+    @is_super_user()
+    @_bot.command(name="router")
+    async def _router_stats(self, ctx: commands.Context) -> None:
+        """Zeigt, wie oft die Nachrichten-Handler der Extensions aufgerufen wurden und wie lange sie
+        dafür gebraucht haben."""
+
+        router = self.bot.router
+
+        with io.StringIO() as output:
+            output.write(
+                f"{router.messages} Nachrichten, Verteilung {router.dispatch_seconds * 1000:.1f} ms gesamt\n```"
+            )
+
+            for handler in router.handlers:
+                average = handler.seconds / handler.calls * 1000 if handler.calls else 0.0
+                output.write(
+                    f"{handler.name:<20}{handler.calls:>8} Aufrufe{handler.seconds * 1000:>10.1f} ms"
+                    f"{average:>8.2f} ms/Aufruf{handler.errors:>5} Fehler\n"
+                )
+
+            output.write("```Krah Krah!")
+
+            await ctx.send(output.getvalue())
+
     @is_super_user()
     @_bot.command(name="reload", aliases=["-r"])
     async def _reload_bot(self, ctx: commands.Context) -> None:
         """Lädt Teile des Bots neu. Das bedeutet im Detail:
 
-        1) Die Settings-Datei wird neu geladen.
+        1) Die Settings-Datei und die Daten-Dateien der Extensions werden neu geladen.
         2) Der Server wird neu analysiert.
 
         Achtung: Dieser Befehl startet nicht wirklich das Programm neu. Auch werden geladene
@@ -209,7 +321,7 @@ class Administration(commands.Cog, name="Administration"):
         logging.info("%s started a reload...", ctx.author.name)
         await ctx.send("Reload wird gestartet...")
 
-        self.bot.load_files_into_attrs()
+        await self.bot.load_files_into_attrs()
         await self.bot.analyze_guild()
 
         logging.info("Reload complete.")
@@ -314,18 +426,37 @@ class Administration(commands.Cog, name="Administration"):
         await self.bot.analyze_guild()
 
 
+def use_api_base(api_base: str) -> None:
+    """Points discord.py's REST client and gateway to another server than Discord, e.g. the
+    fake server of benchmarks/fake_discord.py for load tests.
+
+    Args:
+        api_base (str): URL of the server like http://127.0.0.1:8080."""
+
+    api_base = api_base.rstrip("/")
+    discord.http.Route.BASE = f"{api_base}/api/v10"
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"{api_base.replace('http', 'ws', 1)}/gateway")
+
+    logging.warning("Using the Discord API at %s instead of Discord.", api_base)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Moevius Discord Bot")
+    parser.add_argument("--api-base", default=None, help="URL of a stand-in for the Discord API, e.g. for load tests")
+    return parser.parse_args()
+
+
 async def main() -> None:
     """The main function to start the discord bot. The following actions are executed:
 
-    1) load the .env file for the API Token (exits if not found)
-    2) initialize the Bot object which inherits from discord.ext.commands.Bot
-    3) add the cog with the admin functions to the bot
-    4) connect the bot to the Discord-API."""
+    1) check the API Token from the .env file (exits if not found)
+    2) add the cog with the admin functions to the bot
+    3) connect the bot to the Discord-API."""
 
-    load_dotenv()
-
-    if (discord_token := os.getenv("DISCORD_TOKEN")) is None:
-        sys.exit("Discord token not found! Please check your .env file!")
+    try:
+        discord_token = MOEVIUS.config.get_secret("DISCORD_TOKEN")
+    except MissingSecretError as err_msg:
+        sys.exit(str(err_msg))
 
     logging.info("Discord token loaded successfully.")
 
@@ -334,6 +465,9 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    if (api_base := parse_args().api_base) is not None:
+        use_api_base(api_base)
+
     try:
         run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,53 @@
+"""This tool contains a small bounded LRU cache with hit and miss counters."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+
+class LRUCache[K, V]:
+    """Mapping with a maximum size. When it is full, the least recently used entry is
+    dropped. Hits and misses of get are counted, so the size can be tuned."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        """Returns the value of the key and marks it as recently used, or None on a miss."""
+
+        if (value := self._data.get(key)) is None:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Stores the value and drops the least recently used entry if the cache is full."""
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups which were hits, 0 if there were no lookups yet."""
+
+        return self.hits / lookups if (lookups := self.hits + self.misses) else 0.0
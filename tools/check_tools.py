@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from enum import Enum
+from typing import TYPE_CHECKING
 
 import discord
 from discord.ext import commands
 
-from tools.json_tools import load_file
+if TYPE_CHECKING:
+    from bot import Bot
 
 
 class SpecialUser(Enum):
@@ -24,13 +26,8 @@ def is_special_user(user_list: list[SpecialUser]):  # noqa: ANN201
 
 
 def is_super_user():  # noqa: ANN201
-    async def wrapper(ctx: commands.Context) -> bool:
-        settings = load_file("json/settings.json")
-
-        if not isinstance(settings, dict):
-            return False
-
-        return ctx.author.name in settings["super-users"]
+    async def wrapper(ctx: commands.Context[Bot]) -> bool:
+        return ctx.bot.config.is_super_user(ctx.author.name)
 
     return commands.check(wrapper)
 
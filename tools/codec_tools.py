@@ -0,0 +1,131 @@
+"""This tool contains the JSON codec used for all persisted files. It uses orjson or msgspec
+if one of them is installed and falls back to the json module of the standard library."""
+
+from __future__ import annotations
+
+import datetime as dt
+import importlib
+import json
+import logging
+import os
+from enum import Enum
+from typing import Any
+
+
+class JsonCodec(Enum):
+    """Enum of the supported JSON libraries"""
+
+    ORJSON = "orjson"
+    MSGSPEC = "msgspec"
+    STDLIB = "json"
+
+
+def json_ser(obj: object) -> str:
+    if isinstance(obj, dt.datetime):
+        return obj.isoformat()
+    raise TypeError
+
+
+def detect_codec() -> JsonCodec:
+    """Returns the fastest installed JSON library, orjson is preferred over msgspec. A
+    library which is installed but can't be imported is skipped.
+
+    Returns:
+        JsonCodec: The detected library."""
+
+    for codec in (JsonCodec.ORJSON, JsonCodec.MSGSPEC):
+        try:
+            importlib.import_module(codec.value)
+        except ImportError:
+            logging.debug("JSON library %s is not available.", codec.value)
+            continue
+
+        return codec
+
+    return JsonCodec.STDLIB
+
+
+def get_default_indent() -> int | None:
+    """Reads the on-disk format from the environment variable JSON_COMPACT.
+
+    Returns:
+        int | None: None for compact files without indentation, otherwise 4."""
+
+    return None if os.getenv("JSON_COMPACT", "").lower() in {"1", "true", "yes"} else 4
+
+
+def _orjson_dumps(obj: Any, indent: int | None) -> str:  # noqa: ANN401
+    import orjson  # noqa: PLC0415
+
+    # orjson only supports an indentation of two spaces
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, default=json_ser, option=option).decode("utf-8")
+
+
+def _msgspec_dumps(obj: Any, indent: int | None) -> str:  # noqa: ANN401
+    import msgspec  # noqa: PLC0415
+
+    data = msgspec.json.encode(obj, enc_hook=json_ser)
+
+    if indent:
+        data = msgspec.json.format(data, indent=indent)
+
+    return data.decode("utf-8")
+
+
+def _stdlib_dumps(obj: Any, indent: int | None) -> str:  # noqa: ANN401
+    if indent:
+        return json.dumps(obj, indent=indent, default=json_ser)
+
+    return json.dumps(obj, separators=(",", ":"), default=json_ser)
+
+
+def _orjson_loads(data: str | bytes) -> Any:  # noqa: ANN401
+    import orjson  # noqa: PLC0415
+
+    return orjson.loads(data)
+
+
+def _msgspec_loads(data: str | bytes) -> Any:  # noqa: ANN401
+    import msgspec  # noqa: PLC0415
+
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as err:
+        raise ValueError(str(err)) from err
+
+
+_DUMPS = {JsonCodec.ORJSON: _orjson_dumps, JsonCodec.MSGSPEC: _msgspec_dumps, JsonCodec.STDLIB: _stdlib_dumps}
+_LOADS = {JsonCodec.ORJSON: _orjson_loads, JsonCodec.MSGSPEC: _msgspec_loads, JsonCodec.STDLIB: json.loads}
+
+CODEC = detect_codec()
+logging.debug("JSON codec: %s", CODEC.value)
+
+
+def dumps(obj: Any, /, indent: int | None = 4, codec: JsonCodec = CODEC) -> str:  # noqa: ANN401
+    """Serializes an object to a JSON string. Datetimes are stored in ISO format.
+
+    Args:
+        obj (Any): The object to serialize.
+        indent (int | None, optional): Indentation, None for compact output. Defaults to 4.
+        codec (JsonCodec, optional): Defaults to the detected library.
+
+    Returns:
+        str: The JSON string."""
+
+    return _DUMPS[codec](obj, indent)
+
+
+def loads(data: str | bytes, /, codec: JsonCodec = CODEC) -> Any:  # noqa: ANN401
+    """Parses a JSON string or bytes.
+
+    Raises ValueError, if the data is no valid JSON.
+
+    Args:
+        data (str | bytes): The JSON data.
+        codec (JsonCodec, optional): Defaults to the detected library.
+
+    Returns:
+        Any: The parsed object."""
+
+    return _LOADS[codec](data)
@@ -0,0 +1,129 @@
+"""This tool contains the configuration service of the bot. It loads the settings and the
+.env-file once and provides typed access to the values."""
+
+from __future__ import annotations
+
+import logging
+import os
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from dotenv import dotenv_values
+
+from tools.history_tools import DEFAULT_MAX_CHANNELS, DEFAULT_MESSAGES_PER_CHANNEL
+from tools.io_tools import run_io
+from tools.storage_tools import SQLiteDict, open_store
+
+if TYPE_CHECKING:
+    from tools.json_tools import DictFile
+    from tools.watch_tools import FileWatcher
+
+
+class MissingSecretError(OSError):
+    pass
+
+
+class Config:
+    """Owns the settings store and the secrets of the .env-file. Derived values like the
+    set of super users are computed once per (re)load, so lookups don't touch the disk.
+    With a file watcher, both files are reloaded when they change on disk."""
+
+    def __init__(self, env_path: str = ".env") -> None:
+        self.env_path = env_path
+        self.env: dict[str, str] = {}
+        self._shadowed_env: dict[str, str | None] = {}
+        self.super_users: frozenset[str] = frozenset()
+
+        # The .env-file has to be loaded first, it contains the storage settings.
+        # The settings themselves are loaded together with the other stores of the bot.
+        self.load_env()
+        self.settings: DictFile | SQLiteDict = open_store("settings", load=False)
+
+        logging.info("Config initialized.")
+
+    def load_env(self) -> None:
+        """Reads the .env-file. Variables of the file are exported to the environment for
+        libraries that read it directly. Like in get_secret, the .env-file takes priority
+        over the environment, variables removed from the file get their old value back."""
+
+        self._apply_env(dotenv_values(self.env_path))
+
+    def _apply_env(self, values: dict[str, str | None]) -> None:
+        env = {key: value for key, value in values.items() if value is not None}
+
+        for key in self.env.keys() - env.keys():
+            if (original := self._shadowed_env.pop(key)) is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = original
+
+        for key, value in env.items():
+            if key not in self._shadowed_env:
+                self._shadowed_env[key] = os.environ.get(key)
+
+            os.environ[key] = value
+
+        self.env = env
+
+        logging.debug("Loaded %s variables from %s.", len(self.env), self.env_path)
+
+    def _apply_settings(self, data: dict[str, Any]) -> None:
+        self.settings.replace_data(data)
+        self.update_derived()
+
+    def update_derived(self) -> None:
+        """Computes the values derived from the settings again."""
+
+        self.super_users = frozenset(self.settings.get("super-users", []))
+
+    async def watch(self, watcher: FileWatcher) -> None:
+        """Registers the settings and the .env-file at the file watcher. Settings in the
+        SQLite database are only reloaded on request, since every store writes into it."""
+
+        await watcher.watch(
+            self.settings.file_name,
+            partial(run_io, self.settings.read_data),
+            self._apply_settings,
+            load_now=False,
+            poll=not isinstance(self.settings, SQLiteDict),
+        )
+        await watcher.watch(self.env_path, lambda: run_io(dotenv_values, self.env_path), self._apply_env)
+
+    def get_secret(self, key: str) -> str:
+        """Returns a secret like an API key.
+
+        Raises MissingSecretError, if the secret is neither in the .env-file nor in
+        the environment."""
+
+        if (value := self.env.get(key, os.getenv(key))) is None:
+            msg = f"{key} not found! Please check your .env file!"
+            raise MissingSecretError(msg)
+
+        return value
+
+    def is_super_user(self, name: str) -> bool:
+        return name in self.super_users
+
+    @property
+    def server_id(self) -> int:
+        return int(self.settings["server_id"])
+
+    @property
+    def stream_channel(self) -> str:
+        return self.settings["channels"]["stream"]
+
+    @property
+    def faith_on_react(self) -> int:
+        return int(self.settings["faith_on_react"])
+
+    @property
+    def faith_by_command(self) -> dict[str, int]:
+        return self.settings["faith_by_command"]
+
+    @property
+    def history_messages_per_channel(self) -> int:
+        return int(self.settings.get("history", {}).get("messages_per_channel", DEFAULT_MESSAGES_PER_CHANNEL))
+
+    @property
+    def history_max_channels(self) -> int:
+        return int(self.settings.get("history", {}).get("max_channels", DEFAULT_MAX_CHANNELS))
@@ -0,0 +1,107 @@
+"""This tool contains a buffer of the recent messages per channel. Commands which need
+the previous message read it from memory instead of requesting the channel history."""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import discord
+
+DEFAULT_MESSAGES_PER_CHANNEL = 20
+DEFAULT_MAX_CHANNELS = 256
+
+
+class RecentMessage(NamedTuple):
+    id: int
+    author_id: int
+    content: str
+
+
+class MessageHistory:
+    """Ring buffer of the last messages of each channel. Only the channels with the most
+    recent activity are kept. Edits and deletions are applied, so the buffer mirrors the
+    channel. If the bot hasn't seen a message before the one asking, the channel is cold
+    and the API is used instead."""
+
+    def __init__(
+        self, messages_per_channel: int = DEFAULT_MESSAGES_PER_CHANNEL, max_channels: int = DEFAULT_MAX_CHANNELS
+    ) -> None:
+        self.messages_per_channel = messages_per_channel
+        self.max_channels = max_channels
+        self.hits = 0
+        self.misses = 0
+        self._channels: OrderedDict[int, deque[RecentMessage]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def resize(self, messages_per_channel: int, max_channels: int) -> None:
+        """Changes the limits. Buffers which are too long lose their oldest messages and
+        the channels without recent activity are dropped."""
+
+        self.messages_per_channel = messages_per_channel
+        self.max_channels = max_channels
+
+        for channel_id, messages in self._channels.items():
+            self._channels[channel_id] = deque(messages, maxlen=messages_per_channel)
+
+        while len(self._channels) > max_channels:
+            self._channels.popitem(last=False)
+
+        logging.debug("Message history resized to %s messages in %s channels.", messages_per_channel, max_channels)
+
+    def add(self, message: discord.Message) -> None:
+        if (messages := self._channels.get(message.channel.id)) is None:
+            messages = self._channels[message.channel.id] = deque(maxlen=self.messages_per_channel)
+
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(message.channel.id)
+
+        messages.append(RecentMessage(message.id, message.author.id, message.content))
+
+    def edit(self, channel_id: int, message_id: int, content: str) -> None:
+        for index, recent in enumerate(self._channels.get(channel_id, ())):
+            if recent.id == message_id:
+                self._channels[channel_id][index] = recent._replace(content=content)
+                return
+
+    def delete(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        if (messages := self._channels.get(channel_id)) is None:
+            return
+
+        deleted = set(message_ids)
+        kept = [recent for recent in messages if recent.id not in deleted]
+
+        if len(kept) != len(messages):
+            messages.clear()
+            messages.extend(kept)
+
+    async def previous(self, message: discord.Message) -> RecentMessage | None:
+        """Returns the message posted right before the given one in its channel. The API is
+        only asked if the buffer doesn't reach back that far.
+
+        Args:
+            message (discord.Message): The message, usually the one of a command.
+
+        Returns:
+            RecentMessage | None: The previous message, None if there is none."""
+
+        for recent in reversed(self._channels.get(message.channel.id, ())):
+            if recent.id < message.id:
+                self.hits += 1
+                return recent
+
+        self.misses += 1
+        logging.debug("Message history of channel %s is cold, requesting it.", message.channel.id)
+
+        async for older in message.channel.history(limit=1, before=message):
+            return RecentMessage(older.id, older.author.id, older.content)
+
+        return None
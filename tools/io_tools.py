@@ -0,0 +1,57 @@
+"""This tool contains a bounded thread pool to run blocking file I/O off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+IO_MAX_WORKERS = 4
+
+_io_executor: ThreadPoolExecutor | None = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Returns the shared thread pool for file I/O and creates it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Thread pool with at most IO_MAX_WORKERS threads."""
+
+    global _io_executor  # noqa: PLW0603
+
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_MAX_WORKERS, thread_name_prefix="moevius-io")
+        logging.debug("I/O thread pool started with %s workers.", IO_MAX_WORKERS)
+
+    return _io_executor
+
+
+async def run_io[T](func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:  # noqa: ANN401
+    """Runs a blocking function in the I/O thread pool and waits for its result without
+    blocking the event loop.
+
+    Args:
+        func (Callable[..., T]): The blocking function, e.g. a file read.
+
+    Returns:
+        T: The return value of the function."""
+
+    return await asyncio.get_running_loop().run_in_executor(get_io_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_io_executor() -> None:
+    """Waits for pending I/O and stops the thread pool."""
+
+    global _io_executor  # noqa: PLW0603
+
+    if _io_executor is None:
+        return
+
+    _io_executor.shutdown(wait=True)
+    _io_executor = None
+    logging.debug("I/O thread pool stopped.")
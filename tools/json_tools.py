@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-import datetime as dt
-import json
+import asyncio
 import logging
+from enum import Enum, auto
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
+
+from tools.codec_tools import dumps, get_default_indent, loads
+from tools.io_tools import run_io
 
 
 class EmptyPathError(IOError):
@@ -17,10 +20,12 @@ class DictFileLoadError(Exception):
     pass
 
 
-def json_ser(obj: object) -> str:
-    if isinstance(obj, dt.datetime):
-        return obj.isoformat()
-    raise TypeError
+class Persistence(Enum):
+    """Enum of the supported strategies to persist a DictFile"""
+
+    SYNC = auto()
+    WRITE_BEHIND = auto()
+    JOURNAL = auto()
 
 
 def load_file(file_path: str, /, encoding: str = "utf-8") -> dict[str, Any] | list[Any]:
@@ -40,11 +45,10 @@ def load_file(file_path: str, /, encoding: str = "utf-8") -> dict[str, Any] | li
         msg = "Can't load file, file_path is empty."
         raise EmptyPathError(msg)
 
-    with Path(file_path).open("r", encoding=encoding) as file:
-        return json.load(file)
+    return loads(Path(file_path).read_text(encoding=encoding))
 
 
-def save_file(file_path: str, content: dict, /, indent: int = 4, encoding: str = "utf-8") -> None:
+def save_file(file_path: str, content: dict, /, indent: int | None = 4, encoding: str = "utf-8") -> None:
     """Writes the content dict into a JSON-file under the specified path.
 
     Raises EmptyPathError, if the file path is empty.
@@ -53,34 +57,98 @@ def save_file(file_path: str, content: dict, /, indent: int = 4, encoding: str =
     Args:
         file_path (str): Path to the desired JSON-file, including .json suffix
         content (dict): _description_
-        indent (int, optional): _description_. Defaults to 4."""
+        indent (int | None, optional): None writes a compact file. Defaults to 4."""
 
     if str(file_path) == "":
         msg = "Can't save file, file_path is empty."
         raise EmptyPathError(msg)
 
-    with Path(file_path).open("w", encoding=encoding) as file:
-        json.dump(content, file, indent=indent, default=json_ser)
+    write_file_atomic(file_path, dumps(content, indent=indent), encoding=encoding)
+
+
+async def async_load_file(file_path: str, /, encoding: str = "utf-8") -> dict[str, Any] | list[Any]:
+    """Same as load_file, but the file is read and parsed in the I/O thread pool, so the
+    event loop is not blocked."""
+
+    return await run_io(load_file, file_path, encoding=encoding)
+
+
+def write_file_atomic(file_path: str, text: str, /, encoding: str = "utf-8") -> None:
+    """Writes the text into a temporary file next to the target and renames it afterwards,
+    so readers never see a partially written file.
+
+    Args:
+        file_path (str): Path to the desired file
+        text (str): Content of the file
+        encoding (str, optional): Defaults to 'utf-8'."""
+
+    path = Path(file_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with tmp_path.open("w", encoding=encoding) as file:
+        file.write(text)
+
+    tmp_path.replace(path)
 
 
 class DictFile(dict):
     """Extension to the dict type to automatically save the dictionary as a .json-file
     when it is updated. Additionally new dicts can directly by populated with data from
-    a file."""
-
-    def __init__(
-        self, name: str, /, suffix: str = ".json", path: str = "json/", *, load_from_file: bool = True
+    a file.
+
+    With Persistence.WRITE_BEHIND, mutations only mark the dict as dirty. A single
+    snapshot is written after the dict stayed unchanged for `debounce` seconds, but
+    at the latest `max_latency` seconds after the first unsaved mutation.
+
+    With Persistence.JOURNAL, every mutation appends one JSON line to name.journal.
+    When loading, the journal is replayed on top of the snapshot. Once the journal is
+    bigger than `journal_threshold` bytes, it is folded back into the snapshot in the
+    background."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        /,
+        suffix: str = ".json",
+        path: str = "json/",
+        *,
+        load_from_file: bool = True,
+        persistence: Persistence = Persistence.SYNC,
+        debounce: float = 2.0,
+        max_latency: float = 10.0,
+        journal_threshold: int = 256 * 1024,
+        indent: int | None = None,
     ) -> None:
         """Initializes a new dict which is linked to a file.
 
         By default, it tries to load data from the file when created.
         The usual path for this is ./json/name.json and if the path
-        does not exist, the dicts will be created."""
+        does not exist, the dicts will be created. Without an indent,
+        the JSON_COMPACT setting decides about the on-disk format."""
 
         logging.debug("Initializing DictFile %s ...", name)
 
         super().__init__()
         self.file_name = path + name + suffix
+        self.persistence = persistence
+        self.debounce = debounce
+        self.max_latency = max_latency
+        self.journal_name = path + name + ".journal"
+        self.journal_threshold = journal_threshold
+        self.indent = get_default_indent() if indent is None else indent
+
+        self._dirty = False
+        self._dirty_since: float | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._last_snapshot: str | None = None
+        self._write_lock = asyncio.Lock()
+        self._background_flushes: set[asyncio.Task] = set()
+        self._journal_file: TextIO | None = None
+        self._journal_size = 0
+        self._compacting = False
+        self._compact_again = False
+        self._compaction_done = asyncio.Event()
+        self._compaction_done.set()
 
         if not Path(path).exists():
             Path(path).mkdir(parents=True)
@@ -89,39 +157,333 @@ class DictFile(dict):
         if not load_from_file:
             return
 
-        json_file = load_file(self.file_name)
+        self.replace_data(self.read_data())
+
+        logging.info("DictFile %s initialized succesfully.", self.file_name)
+
+    def read_data(self) -> dict[str, Any]:
+        """Reads the file and, in journal mode, replays the journals without touching the
+        dict itself. This is safe to call from the I/O thread pool.
+
+        Returns:
+            dict[str, Any]: The content of the file, empty if the file doesn't exist yet."""
+
+        if Path(self.file_name).exists():
+            json_file = load_file(self.file_name)
+        else:
+            logging.info("File %s not found, the DictFile starts empty.", self.file_name)
+            json_file = {}
 
         if not isinstance(json_file, dict):
             msg = "DictFile could not be loaded. JSON-File formatted wrong."
             raise DictFileLoadError(msg)
 
-        self.update(json_file)
-
         logging.debug("Loaded data from file %s. %s keys.", self.file_name, len(json_file.keys()))
-        logging.info("DictFile %s initialized succesfully.", self.file_name)
+
+        if self.persistence is Persistence.JOURNAL:
+            self._replay_journals(json_file)
+
+        return json_file
+
+    def replace_data(self, data: dict[str, Any]) -> None:
+        """Swaps the content of the dict for the given data without writing it. Changes
+        which are not written yet are discarded."""
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        self._dirty = False
+        self._dirty_since = None
+        self._last_snapshot = None
+
+        super().clear()
+        super().update(data)
+
+        if self.persistence is not Persistence.JOURNAL:
+            return
+
+        self._journal_size = Path(self.journal_name).stat().st_size if Path(self.journal_name).exists() else 0
+
+        # The journals are already replayed in the data, so the interrupted compaction is
+        # finished in the background instead of writing while the stores are loaded.
+        if Path(self.journal_name + ".compacting").exists():
+            self._start_compaction()
+
+    def size_on_disk(self) -> int:
+        """Returns the size of the file and the journals in bytes."""
+
+        paths = (Path(self.file_name), Path(self.journal_name), Path(self.journal_name + ".compacting"))
+        return sum(path.stat().st_size for path in paths if path.exists())
+
+    def reload(self) -> None:
+        """Replaces the content of the dict with the content of its file. Changes which
+        are not written yet are discarded."""
+
+        self.replace_data(self.read_data())
+
+        logging.info("DictFile %s reloaded.", self.file_name)
 
     def __setitem__(self, key: str, value: Any, /) -> None:  # noqa: ANN401
         super().__setitem__(key, value)
 
         logging.debug("DictFile %s item set. %s: %s", self.file_name, key, value)
 
-        save_file(self.file_name, self)
+        self._record([{"op": "set", "key": key, "value": value}])
 
     def update(self, m, /) -> None:  # noqa: ANN001
-        super().update(m)
+        items = list(m.items() if hasattr(m, "items") else m)
+        super().update(items)
 
         logging.debug("DictFile %s updated", self.file_name)
 
-        save_file(self.file_name, self)
+        self._record([{"op": "set", "key": key, "value": value} for key, value in items])
 
     def pop(self, key):  # noqa: ANN001, ANN201
         item = super().pop(key)
 
         logging.debug("DictFile %s popped.", self.file_name)
 
-        save_file(self.file_name, self)
+        self._record([{"op": "pop", "key": key}])
 
         return item
 
     def save(self) -> None:
-        save_file(self.file_name, self)
+        if self.persistence is Persistence.JOURNAL:
+            self.compact()
+            return
+
+        self._dirty = True
+        self.flush()
+
+    @property
+    def is_dirty(self) -> bool:
+        """Is True if the dict contains changes which are not written to the file yet."""
+
+        return self._dirty
+
+    def _record(self, ops: list[dict[str, Any]]) -> None:
+        """Persists the given operations according to the persistence strategy."""
+
+        if self.persistence is not Persistence.JOURNAL:
+            self._mark_dirty()
+            return
+
+        if not ops:
+            return
+
+        if self._journal_file is None:
+            self._journal_file = Path(self.journal_name).open("a", encoding="utf-8")  # noqa: SIM115
+
+        lines = "".join(dumps(op, indent=None) + "\n" for op in ops)
+        self._journal_file.write(lines)
+        self._journal_file.flush()
+        self._journal_size += len(lines)
+
+        if self._journal_size > self.journal_threshold and not self._compacting:
+            self._start_compaction()
+
+    def _replay_journals(self, data: dict[str, Any]) -> None:
+        """Applies the leftovers of an interrupted compaction and the journal to the data."""
+
+        compacting = Path(self.journal_name + ".compacting")
+
+        for journal in (compacting, Path(self.journal_name)):
+            if not journal.exists():
+                continue
+
+            with journal.open("r", encoding="utf-8") as file:
+                for line_number, line in enumerate(file, 1):
+                    try:
+                        op = loads(line)
+                    except ValueError:
+                        logging.warning("Skipped broken line %s in journal %s.", line_number, journal)
+                        continue
+
+                    if op["op"] == "set":
+                        data[op["key"]] = op["value"]
+                    elif op["op"] == "pop":
+                        data.pop(op["key"], None)
+
+            logging.debug("Replayed journal %s.", journal)
+
+    def _rotate_journal(self) -> str:
+        """Moves the current journal aside, so new operations go into a fresh one, and
+        returns a snapshot which contains every operation of the moved journal."""
+
+        snapshot = dumps(self, indent=self.indent)
+
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+        journal = Path(self.journal_name)
+        compacting = Path(self.journal_name + ".compacting")
+
+        if journal.exists() and compacting.exists():
+            # A failed compaction left its journal behind, its operations must stay on
+            # disk until the snapshot which contains them is written.
+            with compacting.open("a", encoding="utf-8") as file:
+                file.write(journal.read_text(encoding="utf-8"))
+
+            journal.unlink()
+        elif journal.exists():
+            journal.replace(compacting)
+
+        self._journal_size = 0
+
+        return snapshot
+
+    def _write_compacted(self, snapshot: str) -> None:
+        write_file_atomic(self.file_name, snapshot)
+        Path(self.journal_name + ".compacting").unlink(missing_ok=True)
+
+    def _start_compaction(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact()
+            return
+
+        task = asyncio.create_task(self.acompact())
+        self._background_flushes.add(task)
+        task.add_done_callback(self._background_flushes.discard)
+
+    def compact(self) -> None:
+        """Folds the journal into the snapshot file. During a background compaction, the
+        running compaction is repeated instead, so changes made in place are written too."""
+
+        if self._compacting:
+            logging.debug("DictFile %s is already compacting, it compacts again afterwards.", self.file_name)
+            self._compact_again = True
+            return
+
+        self._write_compacted(self._rotate_journal())
+        logging.debug("DictFile %s compacted.", self.file_name)
+
+    async def acompact(self) -> None:
+        """Same as compact, but the snapshot is written in the I/O thread pool. If a
+        compaction is running, it is repeated afterwards and this waits for both."""
+
+        if self._compacting:
+            self._compact_again = True
+            await self._compaction_done.wait()
+            return
+
+        self._compacting = True
+        self._compaction_done.clear()
+
+        try:
+            while True:
+                self._compact_again = False
+                snapshot = self._rotate_journal()
+
+                async with self._write_lock:
+                    await run_io(self._write_compacted, snapshot)
+
+                logging.debug("DictFile %s compacted.", self.file_name)
+
+                if not self._compact_again:
+                    break
+        finally:
+            self._compacting = False
+            self._compaction_done.set()
+        self._compact_again = False
+        self._compaction_done = asyncio.Event()
+        self._compaction_done.set()
+
+    def _mark_dirty(self) -> None:
+        """Marks the dict as changed and either writes it directly or schedules the
+        background flush, depending on the persistence strategy."""
+
+        self._dirty = True
+
+        if self.persistence is Persistence.SYNC:
+            self.flush()
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to schedule on, e.g. during startup, so write directly.
+            self.flush()
+            return
+
+        now = loop.time()
+
+        if self._dirty_since is None:
+            self._dirty_since = now
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+
+        self._flush_handle = loop.call_at(
+            min(now + self.debounce, self._dirty_since + self.max_latency), self._start_background_flush
+        )
+
+    def _start_background_flush(self) -> None:
+        task = asyncio.create_task(self.aflush())
+        self._background_flushes.add(task)
+        task.add_done_callback(self._background_flushes.discard)
+
+    def _take_snapshot(self) -> str | None:
+        """Serializes the dict and resets the dirty state.
+
+        Returns:
+            str | None: The snapshot or None if there is nothing new to write."""
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._dirty:
+            return None
+
+        self._dirty = False
+        self._dirty_since = None
+
+        if (snapshot := dumps(self, indent=self.indent)) == self._last_snapshot:
+            logging.debug("DictFile %s unchanged, write skipped.", self.file_name)
+            return None
+
+        self._last_snapshot = snapshot
+        return snapshot
+
+    def flush(self) -> None:
+        """Writes a snapshot of the dict to its file if there are unsaved changes.
+        The write is skipped if the snapshot equals the last written one."""
+
+        if (snapshot := self._take_snapshot()) is None:
+            return
+
+        write_file_atomic(self.file_name, snapshot)
+        logging.debug("DictFile %s flushed.", self.file_name)
+
+    async def aflush(self) -> None:
+        """Same as flush, but the file is written in the I/O thread pool. Snapshots are
+        written in the order they were taken. When it returns, every change made before
+        is on disk, even if a background flush took the snapshot."""
+
+        snapshot = self._take_snapshot()
+
+        # Waits for writes which were started before, also if there is nothing new to write.
+        async with self._write_lock:
+            if snapshot is None:
+                return
+
+            await run_io(write_file_atomic, self.file_name, snapshot)
+
+        logging.debug("DictFile %s flushed.", self.file_name)
+
+    async def aclose(self) -> None:
+        """Cancels the scheduled background flush and writes pending changes. Should be
+        called before shutdown or when the owner of the dict is unloaded."""
+
+        await self.aflush()
+
+        if self._background_flushes:
+            await asyncio.gather(*self._background_flushes)
+
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
@@ -0,0 +1,139 @@
+"""This tool contains the monitor of the event loop. It measures how late the loop wakes
+up and finds out from a watchdog thread which function blocked it."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+
+LAG_INTERVAL = 0.1
+LAG_THRESHOLD = 0.25
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class LagOffender:
+    """Dataclass to represent a function which blocked the event loop"""
+
+    name: str
+    stack: str
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+def _is_project_frame(frame: traceback.FrameSummary) -> bool:
+    path = Path(frame.filename)
+    return path.is_relative_to(PROJECT_ROOT) and "site-packages" not in path.parts and path.name != "lag_tools.py"
+
+
+def blocking_function(stack: traceback.StackSummary) -> str:
+    """Returns the innermost function of the project in the stack, or the innermost
+    function at all if the stack doesn't pass through the project."""
+
+    frame = next((frame for frame in reversed(stack) if _is_project_frame(frame)), stack[-1])
+    return f"{Path(frame.filename).name}:{frame.lineno} {frame.name}"
+
+
+class LoopLagMonitor:
+    """Wakes up every interval seconds and measures how late it is. A watchdog thread
+    checks that the monitor keeps waking up. If the loop is stuck for longer than the
+    threshold, the watchdog captures the stack of the loop's thread, and the blocking
+    function is blamed for the lag once the loop is free again."""
+
+    def __init__(self, interval: float = LAG_INTERVAL, threshold: float = LAG_THRESHOLD) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = 0
+        self.lag_seconds = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.offenders: dict[str, LagOffender] = {}
+        self._heartbeat = time.monotonic()
+        self._captured: LagOffender | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._loop_thread_id = 0
+
+    @property
+    def average_lag(self) -> float:
+        return self.lag_seconds / self.samples if self.samples else 0.0
+
+    def start(self) -> None:
+        """Starts the monitor task and the watchdog thread. Has to be called on the loop."""
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._monitor(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+        logging.info("Loop lag monitor started. Threshold: %s ms.", round(self.threshold * 1000))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _monitor(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+
+            with self._lock:
+                self._heartbeat = now
+                captured, self._captured = self._captured, None
+
+            self.samples += 1
+            self.lag_seconds += lag
+            self.max_lag = max(self.max_lag, lag)
+
+            if lag >= self.threshold:
+                self._blame(captured, lag)
+
+    def _blame(self, captured: LagOffender | None, lag: float) -> None:
+        self.stalls += 1
+
+        if captured is None:
+            logging.warning("Event loop lagged %s ms, the blocking function wasn't caught.", round(lag * 1000))
+            return
+
+        offender = self.offenders.setdefault(captured.name, captured)
+        offender.count += 1
+        offender.seconds += lag
+        offender.max_seconds = max(offender.max_seconds, lag)
+
+        logging.warning(
+            "Event loop blocked for %s ms by %s.\n%s", round(lag * 1000), captured.name, captured.stack.rstrip()
+        )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                stuck = time.monotonic() - self._heartbeat > self.threshold
+                needs_capture = stuck and self._captured is None
+
+            if not needs_capture:
+                continue
+
+            if (frame := sys._current_frames().get(self._loop_thread_id)) is None:  # noqa: SLF001
+                continue
+
+            stack = traceback.extract_stack(frame)
+            captured = LagOffender(blocking_function(stack), "".join(stack.format()[-8:]))
+
+            with self._lock:
+                self._captured = captured
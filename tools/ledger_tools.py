@@ -0,0 +1,298 @@
+"""This tool contains the faith ledger. Every change of faith points is appended to a
+ledger file, while the balances and daily buckets are kept up to date in memory."""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+from tools.codec_tools import dumps, loads
+from tools.dt_tools import get_local_timezone
+from tools.io_tools import run_io
+from tools.json_tools import write_file_atomic
+from tools.ranking_tools import RankIndex
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from tools.json_tools import DictFile
+    from tools.storage_tools import SQLiteDict
+
+DEFAULT_LEDGER_PATH = "json/faith.ledger"
+BUCKET_RETENTION_DAYS = 400
+
+
+class FaithReason(Enum):
+    """Enum of the reasons why faith points were given"""
+
+    REACTION = "reaction"
+    COMMAND = "command"
+    MANUAL = "manual"
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """Dataclass to represent a single change of faith points. The giver is None if the
+    points were granted by the bot itself, e.g. for reacting to a message."""
+
+    receiver: str
+    amount: int
+    reason: FaithReason
+    giver: str | None = None
+    timestamp: dt.datetime = field(default_factory=lambda: dt.datetime.now(tz=get_local_timezone()))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ts": self.timestamp.isoformat(),
+            "giver": self.giver,
+            "receiver": self.receiver,
+            "amount": self.amount,
+            "reason": self.reason.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LedgerEntry:
+        return cls(
+            data["receiver"],
+            data["amount"],
+            FaithReason(data["reason"]),
+            data["giver"],
+            dt.datetime.fromisoformat(data["ts"]),
+        )
+
+
+def read_ledger(path: str = DEFAULT_LEDGER_PATH) -> Iterator[LedgerEntry]:
+    """Reads the entries of a ledger file for audits. Broken lines are skipped.
+
+    Args:
+        path (str, optional): Path to the ledger file. Defaults to 'json/faith.ledger'.
+
+    Yields:
+        LedgerEntry: The entries in the order they were written."""
+
+    if not Path(path).exists():
+        return
+
+    with Path(path).open("r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            try:
+                yield LedgerEntry.from_dict(loads(line))
+            except (ValueError, KeyError):
+                logging.warning("Skipped broken line %s in ledger %s.", line_number, path)
+
+
+class FaithLedger:
+    """Records every change of faith points in an append-only ledger. The balances and the
+    points per day and member are maintained incrementally in two stores, which are
+    snapshotted by their own persistence, so reads never replay the ledger. The ranking
+    of the balances is kept in a RankIndex.
+
+    Each ledger line also holds the resulting balance and day total of the receiver. The
+    stores can lag behind the ledger, so recover applies the lines after the last
+    checkpoint again. Setting the totals is idempotent, lines which already reached the
+    stores don't count twice."""
+
+    def __init__(
+        self,
+        balances: DictFile | SQLiteDict,
+        buckets: DictFile | SQLiteDict,
+        /,
+        ledger_path: str = DEFAULT_LEDGER_PATH,
+    ) -> None:
+        self.balances = balances
+        self.buckets = buckets
+        self.ledger_path = ledger_path
+        self.checkpoint_path = ledger_path + ".checkpoint"
+        self.ranking = RankIndex(balances)
+        self._ledger_file: TextIO | None = None
+        self._offset = Path(ledger_path).stat().st_size if Path(ledger_path).exists() else 0
+
+    def balance(self, member_id: str) -> int:
+        return self.balances.get(member_id, 0)
+
+    def record(self, entry: LedgerEntry) -> tuple[int, int] | None:
+        """Appends the entry to the ledger and applies it to the balances, the ranking and
+        the bucket of its day.
+
+        Returns:
+            tuple[int, int] | None: First and last position of the ranking which changed."""
+
+        return self.record_many([entry])
+
+    def record_many(self, entries: list[LedgerEntry]) -> tuple[int, int] | None:
+        """Appends the entries to the ledger with a single write and applies them to the
+        balances and the buckets with a single update of each store.
+
+        Returns:
+            tuple[int, int] | None: First and last position of the ranking which changed,
+                None if there were no entries."""
+
+        if not entries:
+            return None
+
+        balances: dict[str, int] = {}
+        buckets: dict[str, dict[str, int]] = {}
+        lines = []
+
+        for entry in entries:
+            balances[entry.receiver] = balances.get(entry.receiver, self.balance(entry.receiver)) + entry.amount
+
+            if (day := entry.timestamp.date().isoformat()) not in buckets:
+                if day not in self.buckets:
+                    self._prune_buckets(entry.timestamp.date())
+
+                buckets[day] = dict(self.buckets.get(day, {}))
+
+            buckets[day][entry.receiver] = buckets[day].get(entry.receiver, 0) + entry.amount
+
+            line = {**entry.to_dict(), "balance": balances[entry.receiver], "day_total": buckets[day][entry.receiver]}
+            lines.append(dumps(line, indent=None) + "\n")
+
+        if self._ledger_file is None:
+            self._ledger_file = Path(self.ledger_path).open("a", encoding="utf-8")  # noqa: SIM115
+
+        text = "".join(lines)
+        self._ledger_file.write(text)
+        self._ledger_file.flush()
+        self._offset += len(text.encode("utf-8"))
+
+        self.balances.update(balances)
+        self.buckets.update(buckets)
+
+        positions = [self.ranking.update(member_id, balance) for member_id, balance in balances.items()]
+
+        logging.debug("%s ledger entries recorded.", len(entries))
+
+        return min(first for first, _ in positions), max(last for _, last in positions)
+
+    def add(self, receiver: str, amount: int, reason: FaithReason, giver: str | None = None) -> tuple[int, int] | None:
+        return self.record(LedgerEntry(receiver, amount, reason, giver))
+
+    def set_balance(self, receiver: str, amount: int, giver: str | None = None) -> tuple[int, int] | None:
+        """Sets the balance of a member. The difference is recorded as manual change."""
+
+        return self.set_balances({receiver: amount}, giver)
+
+    def set_balances(self, balances: dict[str, int], giver: str | None = None) -> tuple[int, int] | None:
+        """Sets the balances of several members as one batch. The differences are recorded
+        as manual changes, members whose balance doesn't change are skipped."""
+
+        return self.record_many(
+            [
+                LedgerEntry(receiver, delta, FaithReason.MANUAL, giver)
+                for receiver, amount in balances.items()
+                if (delta := amount - self.balance(receiver)) != 0
+            ]
+        )
+
+    def _prune_buckets(self, today: dt.date) -> None:
+        oldest = (today - dt.timedelta(days=BUCKET_RETENTION_DAYS)).isoformat()
+
+        for day in [day for day in self.buckets if day < oldest]:
+            self.buckets.pop(day)
+            logging.debug("Pruned faith bucket %s.", day)
+
+    def leaderboard(self, days: int | None = None) -> dict[str, int]:
+        """Returns the points per member, sorted descending.
+
+        Args:
+            days (int | None, optional): Only count the points of the last days, including
+                today. Defaults to None for the balances.
+
+        Returns:
+            dict[str, int]: Points per member id."""
+
+        if days is None:
+            return dict(self.ranking.items())
+
+        today = dt.datetime.now(tz=get_local_timezone()).date()
+        totals: dict[str, int] = {}
+
+        for offset in range(days):
+            for member_id, amount in self.buckets.get((today - dt.timedelta(days=offset)).isoformat(), {}).items():
+                totals[member_id] = totals.get(member_id, 0) + amount
+
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def _read_tail(self) -> list[dict[str, Any]]:
+        """Reads the ledger lines after the last checkpoint. Lines without the resulting
+        totals, written before they were recorded, can't be applied again and are skipped."""
+
+        offset = 0
+
+        if Path(self.checkpoint_path).exists():
+            offset = loads(Path(self.checkpoint_path).read_text(encoding="utf-8"))["offset"]
+
+        if not Path(self.ledger_path).exists():
+            return []
+
+        if offset > Path(self.ledger_path).stat().st_size:
+            logging.warning("Ledger %s is shorter than its checkpoint, it is replayed completely.", self.ledger_path)
+            offset = 0
+
+        records = []
+
+        with Path(self.ledger_path).open("rb") as file:
+            file.seek(offset)
+
+            for line in file:
+                try:
+                    record = loads(line)
+                except ValueError:
+                    logging.warning("Skipped broken line in ledger %s.", self.ledger_path)
+                    continue
+
+                if "balance" in record and "day_total" in record:
+                    records.append(record)
+
+        return records
+
+    async def recover(self) -> None:
+        """Applies the ledger lines after the last checkpoint to the stores, in case the
+        bot stopped before the stores were written, and writes a new checkpoint."""
+
+        if not (records := await run_io(self._read_tail)):
+            return
+
+        oldest = (
+            dt.datetime.now(tz=get_local_timezone()).date() - dt.timedelta(days=BUCKET_RETENTION_DAYS)
+        ).isoformat()
+        balances: dict[str, int] = {}
+        buckets: dict[str, dict[str, int]] = {}
+
+        for record in records:
+            balances[record["receiver"]] = record["balance"]
+
+            if (day := dt.datetime.fromisoformat(record["ts"]).date().isoformat()) < oldest:
+                continue
+
+            buckets.setdefault(day, dict(self.buckets.get(day, {})))[record["receiver"]] = record["day_total"]
+
+        self.balances.update(balances)
+        self.buckets.update(buckets)
+
+        for member_id, balance in balances.items():
+            self.ranking.update(member_id, balance)
+
+        logging.info("%s ledger entries after the last checkpoint applied.", len(records))
+
+        await self.aflush()
+
+    async def aflush(self) -> None:
+        """Writes pending changes of the balances and the buckets. Afterwards every ledger
+        line up to now is in the stores, so the position is saved as checkpoint."""
+
+        offset = self._offset
+
+        await self.balances.aflush()
+        await self.buckets.aflush()
+        await run_io(write_file_atomic, self.checkpoint_path, dumps({"offset": offset}, indent=None))
+
+    def close(self) -> None:
+        if self._ledger_file is not None:
+            self._ledger_file.close()
+            self._ledger_file = None
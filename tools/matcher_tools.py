@@ -0,0 +1,302 @@
+"""This tool contains a matcher for many response triggers at once. The triggers are
+prefiltered with Aho-Corasick automatons, so a message is scanned only once."""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import deque
+from itertools import groupby
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+REGEX_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+IGNORECASE_PREFIX = "(?i)"
+GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+QUANTIFIER = re.compile(r"([*+?]|\{\d*(?:,\d*)?\})[?+]?")
+# Escapes of several characters: hex, unicode, named characters, octal and backreferences.
+ESCAPE = re.compile(
+    r"\\(?:x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|N\{[^}]*\}|0[0-7]{0,2}|[1-7][0-7]{2}|[1-9][0-9]?|.)",
+    re.DOTALL,
+)
+
+
+def fold_case(text: str) -> str:
+    """Case folding that is at least as loose as re.IGNORECASE, which treats the dotless and
+    the dotted i like an i."""
+
+    return text.casefold().replace("\u0131", "i").replace("\u0307", "")
+
+
+class AhoCorasick:
+    """Automaton which finds every occurrence of a set of words in a single pass over
+    the text, no matter how many words there are."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[frozenset[str]] = [frozenset()]
+
+        for word in words:
+            self._add(word)
+
+        self._link()
+
+    def _add(self, word: str) -> None:
+        state = 0
+
+        for char in word:
+            if (next_state := self._goto[state].get(char)) is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(frozenset())
+
+            state = next_state
+
+        self._output[state] |= {word}
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def find_all(self, text: str) -> set[str]:
+        """Returns every word which occurs in the text."""
+
+        found: set[str] = set()
+        state = 0
+
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+
+            state = self._goto[state].get(char, 0)
+
+            if self._output[state]:
+                found |= self._output[state]
+
+        return found
+
+
+def _skip_group(pattern: str, index: int) -> int | None:
+    """Returns the index after the group or character class starting at index."""
+
+    depth = 0
+
+    while index < len(pattern):
+        char = pattern[index]
+
+        if char == "\\":
+            index += 2
+            continue
+
+        if char == "[":
+            index += 1
+            index += pattern[index : index + 1] == "^"
+            index += pattern[index : index + 1] == "]"
+
+            while index < len(pattern) and pattern[index] != "]":
+                index += 2 if pattern[index] == "\\" else 1
+
+            if depth == 0:
+                return index + 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+
+            if depth == 0:
+                return index + 1
+
+        index += 1
+
+    return None
+
+
+def _group_alternatives(group: str) -> list[str] | None:
+    """Returns the alternatives of a group like (word|other), if they are all plain text."""
+
+    group = group.removeprefix("?:")
+
+    if group.startswith("?"):
+        return None
+
+    alternatives = group.split("|")
+
+    if all(alternative and REGEX_CHARS.search(alternative) is None for alternative in alternatives):
+        return alternatives
+
+    return None
+
+
+def _literal_tokens(pattern: str) -> list[str | list[str] | None] | None:
+    """Splits the top level of a pattern into plain characters, groups of plain alternatives
+    and None for everything else. Returns None if the pattern has alternatives at the top
+    level."""
+
+    tokens: list[str | list[str] | None] = []
+    index = 0
+
+    while index < len(pattern):
+        char = pattern[index]
+
+        if (quantifier := QUANTIFIER.match(pattern, index)) is not None:
+            # A quantifier that allows zero repetitions makes the last token optional.
+            if tokens and quantifier.group(1).startswith(("*", "?", "{0", "{,", "{}")):
+                tokens[-1] = None
+
+            tokens.append(None)
+            index = quantifier.end()
+        elif char == "|":
+            return None
+        elif char == "\\":
+            if (escape := ESCAPE.match(pattern, index)) is None:
+                return None
+
+            escaped = escape.group()[1:]
+            tokens.append(escaped if not escaped.isalnum() and len(escaped) == 1 else None)
+            index = escape.end()
+        elif char in "([":
+            if (end := _skip_group(pattern, index)) is None:
+                return None
+
+            tokens.append(_group_alternatives(pattern[index + 1 : end - 1]) if char == "(" else None)
+            index = end
+        else:
+            tokens.append(None if char in ".^$" else char)
+            index += 1
+
+    return tokens
+
+
+def required_literals(pattern: str) -> tuple[list[str], bool] | None:
+    """Finds pieces of plain text of which every match of the pattern has to contain at
+    least one. Only the top level of the pattern is analyzed, groups are only used if
+    they consist of plain alternatives.
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        tuple[list[str], bool] | None: The pieces of text and whether the pattern ignores
+            the case, None if there are no such pieces."""
+
+    flags = ""
+
+    if (flags_match := GLOBAL_FLAGS.match(pattern)) is not None:
+        flags = flags_match.group(1)
+        pattern = pattern[flags_match.end() :]
+
+    if "x" in flags or (tokens := _literal_tokens(pattern)) is None:
+        return None
+
+    options = [
+        ["".join(map(str, group))]
+        for is_plain, group in groupby(tokens, key=lambda token: isinstance(token, str))
+        if is_plain
+    ]
+    options.extend(token for token in tokens if isinstance(token, list))
+
+    if not options:
+        return None
+
+    # The shortest piece decides how selective an option is.
+    literals = max(options, key=lambda option: (min(map(len, option)), -len(option)))
+    ignorecase = "i" in flags
+
+    return ([fold_case(literal) for literal in literals] if ignorecase else literals), ignorecase
+
+
+class TriggerMatcher:
+    """Finds all triggers which re.search would find in a text, but with one scan. Every
+    trigger is reduced to pieces of text of which each of its matches has to contain one.
+    These pieces are found with one Aho-Corasick automaton for case sensitive triggers and one
+    for case insensitive triggers. Only triggers whose piece occurs in the text are
+    checked with their precompiled pattern, plain words don't even need this check."""
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys: list[str] = []
+        self.patterns: dict[str, re.Pattern] = {}
+        self._always: set[str] = set()
+        self._separate: list[str] = []
+        self._exact: set[str] = set()
+        self._candidates: dict[str, list[str]] = {}
+        self._ignorecase_candidates: dict[str, list[str]] = {}
+
+        for key in keys:
+            try:
+                self.patterns[key] = re.compile(key)
+            except re.error:
+                logging.exception("Invalid response trigger %s, skipped.", key)
+                continue
+
+            self.keys.append(key)
+
+            if not key.removeprefix(IGNORECASE_PREFIX):
+                self._always.add(key)
+                continue
+
+            if REGEX_CHARS.search(key) is None:
+                self._exact.add(key)
+
+            if (literals := required_literals(key)) is None:
+                self._separate.append(key)
+                continue
+
+            texts, ignorecase = literals
+
+            for text in texts:
+                (self._ignorecase_candidates if ignorecase else self._candidates).setdefault(text, []).append(key)
+
+        self._order = {key: index for index, key in enumerate(self.keys)}
+        self._literals = AhoCorasick(self._candidates)
+        self._ignorecase_literals = AhoCorasick(self._ignorecase_candidates)
+
+        logging.debug(
+            "Trigger matcher built. %s plain, %s prefiltered, %s searched one by one.",
+            len(self._exact),
+            len(self.keys) - len(self._exact) - len(self._separate) - len(self._always),
+            len(self._separate),
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def match(self, text: str) -> list[str]:
+        """Returns every trigger that matches somewhere in the text.
+
+        Args:
+            text (str): Content of the message.
+
+        Returns:
+            list[str]: The matching triggers in the order they were given."""
+
+        candidates = {key for word in self._literals.find_all(text) for key in self._candidates[word]}
+
+        if self._ignorecase_candidates:
+            candidates.update(
+                key
+                for word in self._ignorecase_literals.find_all(fold_case(text))
+                for key in self._ignorecase_candidates[word]
+            )
+
+        found = set(self._always)
+        found.update(key for key in candidates if key in self._exact or self.patterns[key].search(text) is not None)
+        found.update(key for key in self._separate if self.patterns[key].search(text) is not None)
+
+        return sorted(found, key=self._order.__getitem__)
@@ -0,0 +1,142 @@
+"""This tool contains the command metrics of the bot: latency histograms, error counts and
+the commands in flight, which can be exported in the Prometheus text format."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from tools.io_tools import run_io
+from tools.json_tools import write_file_atomic
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "moevius"
+DEFAULT_EXPORT_INTERVAL = 60.0
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@dataclass
+class CommandStats:
+    """Dataclass to represent the metrics of one command. The histogram counts per bucket
+    of LATENCY_BUCKETS, the last bucket is for everything slower."""
+
+    name: str
+    count: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def observe(self, seconds: float, *, error: bool = False) -> None:
+        self.count += 1
+        self.errors += error
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), -1)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile of the latency by the upper bound of its bucket."""
+
+        rank = q * self.count
+        total = 0
+
+        for bound, count in zip((*LATENCY_BUCKETS, self.max_seconds), self.histogram, strict=True):
+            total += count
+
+            if total >= rank and count:
+                return min(bound, self.max_seconds)
+
+        return self.max_seconds
+
+
+class CommandMetrics:
+    """Collects the metrics of the commands. Invocations are started and finished with a key
+    that is unique while the command runs, e.g. the id of the context."""
+
+    def __init__(self) -> None:
+        self.commands: dict[str, CommandStats] = {}
+        self._started: dict[int, tuple[str, float]] = {}
+
+    def _stats(self, name: str) -> CommandStats:
+        if (stats := self.commands.get(name)) is None:
+            stats = self.commands[name] = CommandStats(name)
+
+        return stats
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._started)
+
+    def start(self, key: int, name: str) -> None:
+        self._started[key] = name, time.perf_counter()
+        self._stats(name).in_flight += 1
+
+    def finish(self, key: int, *, error: bool = False) -> None:
+        """Records the latency of a started invocation. Unknown keys are ignored, e.g. for
+        errors raised before the command started."""
+
+        if (started := self._started.pop(key, None)) is None:
+            return
+
+        name, start = started
+        stats = self._stats(name)
+        stats.in_flight -= 1
+        stats.observe(time.perf_counter() - start, error=error)
+
+    def observe(self, name: str, seconds: float, *, error: bool = False) -> None:
+        """Records an invocation which wasn't started, e.g. an app command."""
+
+        self._stats(name).observe(seconds, error=error)
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the text format of Prometheus."""
+
+        duration = f"{METRIC_PREFIX}_command_duration_seconds"
+        lines = [
+            f"# HELP {duration} Latency of the commands.",
+            f"# TYPE {duration} histogram",
+        ]
+
+        for stats in self.commands.values():
+            label = f'command="{_label(stats.name)}"'
+            total = 0
+
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.histogram, strict=True):
+                total += count
+                lines.append(f'{duration}_bucket{{{label},le="{bound}"}} {total}')
+
+            lines.append(f"{duration}_sum{{{label}}} {stats.seconds}")
+            lines.append(f"{duration}_count{{{label}}} {stats.count}")
+
+        for metric, kind, help_text, attr in (
+            ("command_errors_total", "counter", "Commands which raised an error.", "errors"),
+            ("commands_in_flight", "gauge", "Commands which are running right now.", "in_flight"),
+        ):
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} {kind}")
+            lines.extend(
+                f'{METRIC_PREFIX}_{metric}{{command="{_label(stats.name)}"}} {getattr(stats, attr)}'
+                for stats in self.commands.values()
+            )
+
+        return "\n".join(lines) + "\n"
+
+    async def export(self, path: str, interval: float = DEFAULT_EXPORT_INTERVAL) -> None:
+        """Writes the metrics into a file every interval seconds, e.g. for the textfile
+        collector of the node exporter. Runs until it is cancelled."""
+
+        logging.info("Exporting command metrics to %s every %s seconds.", path, interval)
+
+        while True:
+            try:
+                await run_io(write_file_atomic, path, self.to_prometheus())
+            except OSError:
+                logging.exception("Could not write the command metrics to %s.", path)
+
+            await asyncio.sleep(interval)
@@ -0,0 +1,121 @@
+"""This tool contains a profiler for the running bot. It profiles everything that runs on
+the event loop for a fixed window and estimates the overhead of the profiler."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import logging
+import marshal
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+MAX_PROFILE_SECONDS = 60.0
+CALIBRATION_CALLS = 20000
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+@dataclass
+class ProfileResult:
+    """Dataclass to represent the outcome of a profiling window"""
+
+    stats: dict
+    seconds: float
+    calls: int
+    overhead_seconds: float
+
+    @property
+    def overhead_share(self) -> float:
+        return self.overhead_seconds / self.seconds if self.seconds else 0.0
+
+    def dumps(self) -> bytes:
+        """Returns the stats in the format of cProfile's dump_stats, for pstats or snakeviz."""
+
+        return marshal.dumps(self.stats)
+
+    def top(self, count: int) -> list[tuple[str, int, float, float]]:
+        """Returns the functions with the highest cumulative time.
+
+        Returns:
+            list[tuple[str, int, float, float]]: Name, calls, own and cumulative seconds."""
+
+        rows = sorted(self.stats.items(), key=lambda item: item[1][3], reverse=True)[:count]
+
+        return [
+            (f"{Path(filename).name}:{line}({name})", calls, own, cumulative)
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows
+        ]
+
+
+def _noop() -> None:
+    pass
+
+
+def _call_overhead() -> float:
+    """Measures how much longer a function call takes while a profiler is running."""
+
+    def calls() -> float:
+        start = time.perf_counter()
+
+        for _ in range(CALIBRATION_CALLS):
+            _noop()
+
+        return time.perf_counter() - start
+
+    plain = calls()
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    try:
+        profiled = calls()
+    finally:
+        profiler.disable()
+
+    return max(profiled - plain, 0.0) / CALIBRATION_CALLS
+
+
+async def profile_loop(seconds: float) -> ProfileResult:
+    """Profiles the event loop for a number of seconds. Only one window can run at a time.
+
+    Args:
+        seconds (float): Length of the window, at most MAX_PROFILE_SECONDS.
+
+    Raises:
+        ProfilerBusyError: If another window is running.
+
+    Returns:
+        ProfileResult: The stats and the estimated overhead."""
+
+    if _profile_lock.locked():
+        msg = "The profiler is already running."
+        raise ProfilerBusyError(msg)
+
+    async with _profile_lock:
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        overhead_per_call = _call_overhead()
+        profiler = cProfile.Profile()
+
+        logging.info("Profiling the event loop for %s seconds.", seconds)
+
+        start = time.perf_counter()
+        profiler.enable()
+
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+        duration = time.perf_counter() - start
+        profiler.create_stats()
+        stats = profiler.stats
+        calls = sum(nc for _, nc, _, _, _ in stats.values())
+
+        logging.info("Profiling done. %s calls in %.2f seconds.", calls, duration)
+
+        return ProfileResult(stats, duration, calls, calls * overhead_per_call)
@@ -0,0 +1,97 @@
+"""This tool contains an order-statistics index for leaderboards. It keeps the members sorted
+by their points, so ranks and pages are answered without sorting everything again."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+
+
+class RankIndex:
+    """Sorted list of (-points, member id) tuples together with the points per member.
+    The position of a member is found by binary search, an update only moves the changed
+    entry and reports which positions were affected."""
+
+    def __init__(self, points: dict[str, int] | None = None) -> None:
+        self._points: dict[str, int] = {}
+        self._keys: list[tuple[int, str]] = []
+
+        if points is not None:
+            self.build(points)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, member_id: object) -> bool:
+        return member_id in self._points
+
+    def build(self, points: dict[str, int]) -> None:
+        """Replaces the content of the index with the given points per member."""
+
+        self._points = dict(points)
+        self._keys = sorted((-amount, member_id) for member_id, amount in self._points.items())
+
+        logging.debug("Rank index built with %s members.", len(self._keys))
+
+    def update(self, member_id: str, points: int) -> tuple[int, int]:
+        """Sets the points of a member and moves it to its new position.
+
+        Args:
+            member_id (str): Id of the member.
+            points (int): The new points of the member.
+
+        Returns:
+            tuple[int, int]: First and last position whose entry changed. For a new member,
+                every position from its own to the end of the list is affected."""
+
+        if (old_points := self._points.get(member_id)) is None:
+            new_position = bisect.bisect_left(self._keys, (-points, member_id))
+            self._keys.insert(new_position, (-points, member_id))
+            self._points[member_id] = points
+            return new_position, len(self._keys) - 1
+
+        old_position = bisect.bisect_left(self._keys, (-old_points, member_id))
+        del self._keys[old_position]
+
+        new_position = bisect.bisect_left(self._keys, (-points, member_id))
+        self._keys.insert(new_position, (-points, member_id))
+        self._points[member_id] = points
+
+        return min(old_position, new_position), max(old_position, new_position)
+
+    def rank(self, member_id: str) -> int | None:
+        """Returns the rank of a member, starting at 1, or None if the member has no points."""
+
+        if (points := self._points.get(member_id)) is None:
+            return None
+
+        return bisect.bisect_left(self._keys, (-points, member_id)) + 1
+
+    def points(self, member_id: str) -> int:
+        return self._points.get(member_id, 0)
+
+    def page(self, number: int, size: int) -> list[tuple[int, str, int]]:
+        """Returns a page of the leaderboard.
+
+        Args:
+            number (int): Number of the page, starting at 1.
+            size (int): Entries per page.
+
+        Returns:
+            list[tuple[int, str, int]]: Rank, member id and points of each entry."""
+
+        start = (number - 1) * size
+
+        return [
+            (start + offset + 1, member_id, -negative_points)
+            for offset, (negative_points, member_id) in enumerate(self._keys[start : start + size])
+        ]
+
+    def page_count(self, size: int) -> int:
+        return max(1, math.ceil(len(self._keys) / size))
+
+    def items(self) -> list[tuple[str, int]]:
+        """Returns member id and points of every member, sorted descending by points."""
+
+        return [(member_id, -negative_points) for negative_points, member_id in self._keys]
@@ -0,0 +1,144 @@
+"""This tool contains the message router of the bot. Cogs register their message handlers
+with filters, and each message is only handed to the handlers that are interested."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    import discord
+
+
+@dataclass(eq=False)
+class MessageHandler:
+    """A message handler together with its filters and statistics. A handler without
+    channel ids gets the messages of every channel."""
+
+    name: str
+    callback: Callable[[discord.Message], Awaitable[None]]
+    channel_ids: frozenset[int] | None = None
+    prefix: str | None = None
+    author_ids: frozenset[int] | None = None
+    ignore_self: bool = False
+    predicate: Callable[[discord.Message], bool] | None = None
+    calls: int = field(default=0, init=False)
+    seconds: float = field(default=0.0, init=False)
+    errors: int = field(default=0, init=False)
+
+    def accepts(self, message: discord.Message, self_id: int | None) -> bool:
+        """Checks the cheap filters first and the predicate last."""
+
+        return (
+            (self.prefix is None or message.content.startswith(self.prefix))
+            and (self.author_ids is None or message.author.id in self.author_ids)
+            and not (self.ignore_self and message.author.id == self_id)
+            and (self.predicate is None or self.predicate(message))
+        )
+
+
+class MessageRouter:
+    """Hands each message to the registered handlers whose filters accept it. Handlers are
+    indexed by channel, so a message only visits the handlers of its channel and the ones
+    for all channels. Each handler runs in its own task, like a listener of discord.py."""
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.dispatch_seconds = 0.0
+        self._all_channels: list[MessageHandler] = []
+        self._by_channel: dict[int, list[MessageHandler]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def handlers(self) -> list[MessageHandler]:
+        by_channel = {handler for handlers in self._by_channel.values() for handler in handlers}
+        return self._all_channels + sorted(by_channel, key=lambda handler: handler.name)
+
+    def register(  # noqa: PLR0913
+        self,
+        name: str,
+        callback: Callable[[discord.Message], Awaitable[None]],
+        *,
+        channel_ids: set[int] | None = None,
+        prefix: str | None = None,
+        author_ids: set[int] | None = None,
+        ignore_self: bool = False,
+        predicate: Callable[[discord.Message], bool] | None = None,
+    ) -> MessageHandler:
+        """Registers a message handler.
+
+        Args:
+            name (str): Name of the handler for the statistics, e.g. 'misc.responses'.
+            callback (Callable[[discord.Message], Awaitable[None]]): The handler itself.
+            channel_ids (set[int] | None, optional): Only messages of these channels.
+            prefix (str | None, optional): Only messages starting with the prefix.
+            author_ids (set[int] | None, optional): Only messages of these authors.
+            ignore_self (bool, optional): Skips the messages of the bot. Defaults to False.
+            predicate (Callable[[discord.Message], bool] | None, optional): Checked last,
+                e.g. whether a game session is active.
+
+        Returns:
+            MessageHandler: Handle to remove the handler with unregister."""
+
+        handler = MessageHandler(
+            name,
+            callback,
+            None if channel_ids is None else frozenset(channel_ids),
+            prefix,
+            None if author_ids is None else frozenset(author_ids),
+            ignore_self,
+            predicate,
+        )
+
+        if handler.channel_ids is None:
+            self._all_channels.append(handler)
+        else:
+            for channel_id in handler.channel_ids:
+                self._by_channel.setdefault(channel_id, []).append(handler)
+
+        logging.debug("Message handler %s registered.", name)
+        return handler
+
+    def unregister(self, handler: MessageHandler) -> None:
+        if handler in self._all_channels:
+            self._all_channels.remove(handler)
+
+        for channel_id in handler.channel_ids or ():
+            if handler in (handlers := self._by_channel.get(channel_id, [])):
+                handlers.remove(handler)
+
+            if not handlers:
+                self._by_channel.pop(channel_id, None)
+
+        logging.debug("Message handler %s unregistered.", handler.name)
+
+    def dispatch(self, message: discord.Message, self_id: int | None = None) -> None:
+        """Starts a task for every handler that accepts the message."""
+
+        start = time.perf_counter()
+        self.messages += 1
+
+        for handler in (*self._all_channels, *self._by_channel.get(message.channel.id, ())):
+            if handler.accepts(message, self_id):
+                task = asyncio.create_task(self._run(handler, message), name=f"router:{handler.name}")
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+        self.dispatch_seconds += time.perf_counter() - start
+
+    async def _run(self, handler: MessageHandler, message: discord.Message) -> None:
+        start = time.perf_counter()
+
+        try:
+            await handler.callback(message)
+        except Exception:
+            handler.errors += 1
+            logging.exception("Message handler %s failed!", handler.name)
+        finally:
+            handler.calls += 1
+            handler.seconds += time.perf_counter() - start
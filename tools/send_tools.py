@@ -0,0 +1,132 @@
+"""This tool contains the outbox of the bot. Messages are queued per channel, short
+responses are merged and sent in the background within the rate limit of the channel."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import discord
+
+if TYPE_CHECKING:
+    from discord.abc import MessageableChannel
+
+MAX_MESSAGE_LENGTH = 2000
+
+
+@dataclass
+class OutgoingMessage:
+    """Dataclass to represent a queued message. Only mergeable messages without an embed
+    are merged."""
+
+    content: str | None = None
+    embed: discord.Embed | None = None
+    mergeable: bool = False
+
+    def merge(self, other: OutgoingMessage) -> bool:
+        """Appends the content of the other message as a new line, if both are mergeable
+        plain text and fit into a single message."""
+
+        if not (self.mergeable and other.mergeable) or self.embed is not None or other.embed is not None:
+            return False
+
+        if self.content is None or other.content is None:
+            return False
+
+        content = self.content.rstrip("\n") + "\n" + other.content
+
+        if len(content) > MAX_MESSAGE_LENGTH:
+            return False
+
+        self.content = content
+        return True
+
+
+@dataclass
+class ChannelQueue:
+    """The pending messages of one channel."""
+
+    channel: MessageableChannel
+    pending: deque[OutgoingMessage] = field(default_factory=deque)
+    task: asyncio.Task | None = None
+
+
+class Outbox:
+    """Sends messages without letting the caller wait. Each channel has its own queue and
+    worker, which sends one message after the other. The rate limit is left to discord.py,
+    which waits for the bucket Discord reports in the response headers. Mergeable messages
+    queued while the worker waits are merged with the previous ones, as long as the result
+    stays within 2000 characters."""
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+        self._queues: dict[int, ChannelQueue] = {}
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue.pending) for queue in self._queues.values())
+
+    def send(
+        self,
+        channel: MessageableChannel,
+        content: str | None = None,
+        *,
+        embed: discord.Embed | None = None,
+        merge: bool = False,
+    ) -> None:
+        """Queues a message for the channel and returns right away. Errors are only logged.
+
+        Args:
+            channel (MessageableChannel): The channel, e.g. message.channel.
+            content (str | None, optional): Text of the message. Defaults to None.
+            embed (discord.Embed | None, optional): Embed of the message. Defaults to None.
+            merge (bool, optional): Whether the message may be merged with other mergeable
+                messages, e.g. for responses. Defaults to False."""
+
+        if (queue := self._queues.get(channel.id)) is None:
+            queue = self._queues[channel.id] = ChannelQueue(channel)
+
+        message = OutgoingMessage(content, embed, merge)
+
+        if queue.pending and queue.pending[-1].merge(message):
+            self.merged += 1
+        else:
+            queue.pending.append(message)
+
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._work(queue), name=f"outbox:{channel.id}")
+
+    async def _work(self, queue: ChannelQueue) -> None:
+        try:
+            while queue.pending:
+                message = queue.pending.popleft()
+
+                try:
+                    await queue.channel.send(content=message.content, embed=message.embed)
+                except discord.HTTPException:
+                    self.failed += 1
+                    logging.exception("Message to channel %s could not be sent.", queue.channel.id)
+                else:
+                    self.sent += 1
+        finally:
+            queue.task = None
+
+            if not queue.pending:
+                self._queues.pop(queue.channel.id, None)
+
+    async def drain(self, max_seconds: float = 10.0) -> None:
+        """Waits until the queued messages are sent, at most max_seconds."""
+
+        if tasks := [queue.task for queue in self._queues.values() if queue.task is not None]:
+            _, unfinished = await asyncio.wait(tasks, timeout=max_seconds)
+
+            for task in unfinished:
+                task.cancel()
+
+            if unfinished:
+                logging.warning("Outbox drained with %s messages left.", self.pending)
@@ -0,0 +1,255 @@
+"""This tool contains the storage backends for the persisted dicts of the bot. Besides the
+.json-files of the DictFile, the data can be stored in a local SQLite database."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import re
+import sqlite3
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from tools.codec_tools import dumps, loads
+from tools.json_tools import DictFile, Persistence, load_file
+
+STORE_NAMES = ("faith", "faith_daily", "squads", "responses", "settings", "quiz_ranking")
+DEFAULT_DB_PATH = "json/moevius.db"
+
+_connections: dict[str, sqlite3.Connection] = {}
+
+
+class StorageBackend(Enum):
+    """Enum of the supported storage backends"""
+
+    JSON = "json"
+    SQLITE = "sqlite"
+
+
+class StoreNameError(ValueError):
+    pass
+
+
+def get_storage_backend() -> StorageBackend:
+    """Reads the storage backend from the environment variable STORAGE_BACKEND.
+
+    Returns:
+        StorageBackend: The configured backend. Defaults to JSON for unknown values."""
+
+    backend = os.getenv("STORAGE_BACKEND", StorageBackend.JSON.value).lower()
+
+    try:
+        return StorageBackend(backend)
+    except ValueError:
+        logging.warning("Storage backend %s not supported, using json.", backend)
+        return StorageBackend.JSON
+
+
+def get_connection(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Returns the shared connection to the database under the given path. New connections
+    are switched to WAL mode, so readers don't block the writer.
+
+    Args:
+        db_path (str, optional): Path to the database file. Defaults to 'json/moevius.db'.
+
+    Returns:
+        sqlite3.Connection: Connection to the database."""
+
+    if (connection := _connections.get(db_path)) is not None:
+        return connection
+
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    _connections[db_path] = connection
+    logging.info("Connected to database %s.", db_path)
+
+    return connection
+
+
+class SQLiteDict(dict):
+    """Extension to the dict type that mirrors every change into its own table of a SQLite
+    database. The interface is the same as the DictFile, but a change of a single key only
+    writes the affected row instead of the whole store."""
+
+    def __init__(self, name: str, /, db_path: str = DEFAULT_DB_PATH, *, load_from_db: bool = True) -> None:
+        """Initializes a new dict which is linked to the table `name` in the database.
+
+        By default, it loads all rows of the table when created. The table is created
+        if it does not exist."""
+
+        logging.debug("Initializing SQLiteDict %s ...", name)
+
+        if not re.fullmatch(r"\w+", name):
+            msg = f"Invalid store name: {name}"
+            raise StoreNameError(msg)
+
+        super().__init__()
+        self.file_name = db_path
+        self.table = name
+        self._connection = get_connection(db_path)
+
+        with self._connection:
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+
+        if not load_from_db:
+            return
+
+        self.replace_data(self.read_data())
+
+        logging.info("SQLiteDict %s initialized succesfully.", self.table)
+
+    def read_data(self) -> dict[str, Any]:
+        """Reads the table through a separate read-only connection without touching the
+        dict itself. This is safe to call from the I/O thread pool.
+
+        Returns:
+            dict[str, Any]: The content of the table."""
+
+        with contextlib.closing(sqlite3.connect(f"file:{self.file_name}?mode=ro", uri=True)) as connection:
+            rows = connection.execute(f'SELECT key, value FROM "{self.table}"').fetchall()  # noqa: S608
+
+        logging.debug("Loaded data from table %s. %s keys.", self.table, len(rows))
+
+        return {key: loads(value) for key, value in rows}
+
+    def size_on_disk(self) -> int:
+        """Returns the size of the keys and values of the table in bytes."""
+
+        with contextlib.closing(sqlite3.connect(f"file:{self.file_name}?mode=ro", uri=True)) as connection:
+            query = f'SELECT COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) FROM "{self.table}"'  # noqa: S608
+            return connection.execute(query).fetchone()[0]
+
+    def replace_data(self, data: dict[str, Any]) -> None:
+        """Swaps the content of the dict for the given data without writing it."""
+
+        super().clear()
+        super().update(data)
+
+    def reload(self) -> None:
+        """Replaces the content of the dict with the content of its table."""
+
+        self.replace_data(self.read_data())
+
+        logging.info("SQLiteDict %s reloaded.", self.table)
+
+    def __setitem__(self, key: str, value: Any, /) -> None:  # noqa: ANN401
+        super().__setitem__(key, value)
+
+        logging.debug("SQLiteDict %s item set. %s: %s", self.table, key, value)
+
+        with self._connection:
+            self._write_rows([(key, value)])
+
+    def update(self, m, /) -> None:  # noqa: ANN001
+        items = list(m.items() if hasattr(m, "items") else m)
+        super().update(items)
+
+        logging.debug("SQLiteDict %s updated", self.table)
+
+        with self._connection:
+            self._write_rows(items)
+
+    def pop(self, key):  # noqa: ANN001, ANN201
+        item = super().pop(key)
+
+        logging.debug("SQLiteDict %s popped.", self.table)
+
+        with self._connection:
+            self._connection.execute(f'DELETE FROM "{self.table}" WHERE key = ?', (key,))  # noqa: S608
+
+        return item
+
+    def save(self) -> None:
+        """Rewrites the whole table. Only needed if nested values were changed in place."""
+
+        with self._connection:
+            self._connection.execute(f'DELETE FROM "{self.table}"')  # noqa: S608
+            self._write_rows(self.items())
+
+    def flush(self) -> None:
+        """Every change is committed immediately, so there is nothing to flush."""
+
+    async def aflush(self) -> None:
+        """Every change is committed immediately, so there is nothing to flush."""
+
+    async def aclose(self) -> None:
+        """Every change is committed immediately, so there is nothing to close."""
+
+    def _write_rows(self, items: Any) -> None:  # noqa: ANN401
+        self._connection.executemany(
+            f'INSERT INTO "{self.table}" (key, value) VALUES (?, ?) '  # noqa: S608
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            ((key, dumps(value, indent=None)) for key, value in items),
+        )
+
+
+def open_store(
+    name: str,
+    /,
+    persistence: Persistence = Persistence.SYNC,
+    backend: StorageBackend | None = None,
+    *,
+    load: bool = True,
+) -> DictFile | SQLiteDict:
+    """Opens the store with the given name in the configured storage backend.
+
+    Args:
+        name (str): Name of the store, e.g. 'faith'.
+        persistence (Persistence, optional): Persistence of the DictFile. Ignored by SQLite.
+        backend (StorageBackend | None, optional): Defaults to the STORAGE_BACKEND setting.
+        load (bool, optional): Loads the data right away. Defaults to True.
+
+    Returns:
+        DictFile | SQLiteDict: The store."""
+
+    if backend is None:
+        backend = get_storage_backend()
+
+    if backend is StorageBackend.SQLITE:
+        return SQLiteDict(name, os.getenv("STORAGE_PATH", DEFAULT_DB_PATH), load_from_db=load)
+
+    return DictFile(name, persistence=persistence, load_from_file=load)
+
+
+def import_json_files(json_path: str = "json/", db_path: str = DEFAULT_DB_PATH, *, overwrite: bool = False) -> None:
+    """One-time migration of the .json-files of all stores into the database. Tables which
+    already contain data are skipped, unless overwrite is set.
+
+    Args:
+        json_path (str, optional): Directory of the .json-files. Defaults to 'json/'.
+        db_path (str, optional): Path to the database file. Defaults to 'json/moevius.db'.
+        overwrite (bool, optional): Replaces existing data in the tables. Defaults to False."""
+
+    for name in STORE_NAMES:
+        if not (file_path := Path(json_path) / f"{name}.json").exists():
+            logging.warning("No file found for store %s, skipped.", name)
+            continue
+
+        store = SQLiteDict(name, db_path)
+
+        if store and not overwrite:
+            logging.warning("Table %s already contains %s keys, skipped.", name, len(store))
+            continue
+
+        if not isinstance(data := load_file(str(file_path)), dict):
+            logging.error("File %s is formatted wrong, skipped.", file_path)
+            continue
+
+        store.clear()
+        dict.update(store, data)
+        store.save()
+
+        logging.info("Imported %s keys from %s into table %s.", len(data), file_path, name)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    import_json_files(os.getenv("JSON_PATH", "json/"), os.getenv("STORAGE_PATH", DEFAULT_DB_PATH))
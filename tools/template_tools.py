@@ -0,0 +1,138 @@
+"""This tool contains the templates for the responses of the bot. They are parsed once and
+can only access a whitelisted set of fields of the message and the trigger match."""
+
+from __future__ import annotations
+
+import logging
+import re
+import string
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import discord
+
+MESSAGE_FIELDS = {
+    "message.author.name": attrgetter("author.name"),
+    "message.author.display_name": attrgetter("author.display_name"),
+    "message.author.mention": attrgetter("author.mention"),
+    "message.channel": attrgetter("channel"),
+    "message.channel.name": attrgetter("channel.name"),
+    "message.channel.mention": attrgetter("channel.mention"),
+}
+MATCH_FIELD = re.compile(r"match\[(\d+|\w+)\]")
+CONVERSIONS: dict[str | None, Callable[[Any], Any]] = {None: lambda value: value, "s": str, "r": repr, "a": ascii}
+
+_formatter = string.Formatter()
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class _Field(NamedTuple):
+    from_match: bool
+    getter: Callable[[Any], Any]
+    conversion: Callable[[Any], Any]
+    spec: str
+
+
+def _match_getter(group: str) -> Callable[[re.Match | None], Any]:
+    key: int | str = int(group) if group.isdigit() else group
+
+    def get_group(match: re.Match | None) -> Any:  # noqa: ANN401
+        if match is None:
+            return ""
+
+        try:
+            return match[key] or ""
+        except IndexError:
+            return ""
+
+    return get_group
+
+
+class Template:
+    """A response text with fields like {message.author.mention} or {match[1]}. The text
+    is parsed once, rendering only joins the literal parts and the resolved fields."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.uses_match = False
+        self._parts: list[str | _Field] = []
+
+        try:
+            parsed = list(_formatter.parse(text))
+        except ValueError as err:
+            msg = f"Template {text!r} is formatted wrong: {err}"
+            raise TemplateError(msg) from err
+
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                self._parts.append(literal)
+
+            if field is None:
+                continue
+
+            if conversion not in CONVERSIONS or "{" in (spec or ""):
+                msg = f"Template {text!r} uses an unsupported format in field {field!r}."
+                raise TemplateError(msg)
+
+            self._parts.append(_Field(*self._getter(field), CONVERSIONS[conversion], spec or ""))
+
+    def _getter(self, field: str) -> tuple[bool, Callable[[Any], Any]]:
+        if (getter := MESSAGE_FIELDS.get(field)) is not None:
+            return False, getter
+
+        if (match_field := MATCH_FIELD.fullmatch(field)) is not None:
+            self.uses_match = True
+            return True, _match_getter(match_field.group(1))
+
+        msg = f"Template {self.text!r} uses the unknown field {field!r}."
+        raise TemplateError(msg)
+
+    def render(self, message: discord.Message, match: re.Match | None = None) -> str:
+        """Fills the fields of the template with the message and the match of the trigger."""
+
+        return "".join(
+            part
+            if isinstance(part, str)
+            else format(part.conversion(part.getter(match if part.from_match else message)), part.spec)
+            for part in self._parts
+        )
+
+
+@dataclass(frozen=True)
+class Response:
+    """Dataclass to represent the compiled texts and the log message of a response"""
+
+    texts: list[Template]
+    log: Template
+
+    @property
+    def uses_match(self) -> bool:
+        return any(text.uses_match for text in self.texts) or self.log.uses_match
+
+
+def compile_responses(section: dict[str, dict[str, Any]]) -> dict[str, Response]:
+    """Compiles the templates of a section of responses.json. Responses with a broken
+    template are logged and skipped, so a typo doesn't take down the other responses.
+
+    Args:
+        section (dict[str, dict[str, Any]]): Trigger mapped to 'res' and 'log'.
+
+    Returns:
+        dict[str, Response]: Trigger mapped to the compiled response."""
+
+    responses = {}
+
+    for key, response in section.items():
+        try:
+            responses[key] = Response([Template(text) for text in response["res"]], Template(response["log"]))
+        except (TemplateError, KeyError, TypeError) as err_msg:
+            logging.error("Response for trigger %s skipped. %s", key, err_msg)  # noqa: TRY400
+
+    return responses
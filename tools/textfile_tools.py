@@ -5,26 +5,47 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
+from tools.io_tools import run_io
+
+
+def _read_lines(filepath: str, encoding: str) -> list[str]:
+    with Path(filepath).open("r", encoding=encoding) as file:
+        return [clean_line for line in file if (clean_line := line.strip())]
+
+
+def _write_lines(filepath: str, lines: list[str], encoding: str, mode: str) -> None:
+    with Path(filepath).open(mode, encoding=encoding) as file:
+        print(*lines, sep="\n", file=file)
+
 
 async def lines_from_textfile(filepath: str, /, encoding: str = "utf-8") -> list[str]:
     """Returns a list of srings that represent the lines of a textfile."""
 
     try:
-        with Path(filepath).open("r", encoding=encoding) as file:  # noqa: ASYNC230
-            output = [clean_line for line in file if (clean_line := line.strip())]
-            logging.debug("Read file %s with %s lines.", filepath, len(output))
-            return output
+        output = await run_io(_read_lines, filepath, encoding)
     except OSError:
         logging.exception("Could not read file %s!", filepath)
-        return output
+        return []
+
+    logging.debug("Read file %s with %s lines.", filepath, len(output))
+    return output
 
 
 async def lines_to_textfile(filepath: str, lines: list[str], /, encoding: str = "utf-8") -> None:
     """Writes a list of strings as lines into a textfile."""
 
     try:
-        with Path(filepath).open("w", encoding=encoding) as file:  # noqa: ASYNC230
-            print(*lines, sep="\n", file=file)
-            logging.debug("Text file %s written with %s lines.", filepath, len(lines))
+        await run_io(_write_lines, filepath, lines, encoding, "w")
+        logging.debug("Text file %s written with %s lines.", filepath, len(lines))
     except OSError:
         logging.exception("Could not write file %s!", filepath)
+
+
+async def lines_append_to_textfile(filepath: str, lines: list[str], /, encoding: str = "utf-8") -> None:
+    """Appends a list of strings as lines to a textfile."""
+
+    try:
+        await run_io(_write_lines, filepath, lines, encoding, "a+")
+        logging.debug("Text file %s appended with %s lines.", filepath, len(lines))
+    except OSError:
+        logging.exception("Could not append to file %s!", filepath)
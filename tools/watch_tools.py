@@ -0,0 +1,140 @@
+"""This tool contains a file watcher that reloads data files when they change on disk."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from tools.io_tools import run_io
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+FileState = tuple[int, int] | None
+
+
+def get_file_state(path: str) -> FileState:
+    """Returns modification time and size of a file, or None if it doesn't exist."""
+
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass(eq=False)
+class WatchedFile:
+    """A file together with the functions to rebuild and swap in its data. A file which
+    isn't polled is only reloaded by reload_all."""
+
+    path: str
+    loader: Callable[[], Awaitable[Any]]
+    on_change: Callable[[Any], None]
+    poll: bool = True
+    state: FileState = field(default=None)
+
+
+class FileWatcher:
+    """Polls the modification times of the watched files. When a file changes, its loader
+    builds the new data off the event loop and the result is handed to on_change, which
+    should only swap a reference, so readers never see a half updated dataset."""
+
+    def __init__(self, interval: float = 5.0) -> None:
+        self.interval = interval
+        self.watched: list[WatchedFile] = []
+        self._task: asyncio.Task | None = None
+
+    async def watch(
+        self,
+        path: str,
+        loader: Callable[[], Awaitable[Any]],
+        on_change: Callable[[Any], None],
+        *,
+        load_now: bool = True,
+        poll: bool = True,
+    ) -> WatchedFile:
+        """Starts watching a file and loads it once right away.
+
+        Args:
+            path (str): Path to the watched file.
+            loader (Callable[[], Awaitable[Any]]): Builds the data, should do the work in the I/O pool.
+            on_change (Callable[[Any], None]): Swaps in the data built by the loader.
+            load_now (bool, optional): False if the data is already loaded. Defaults to True.
+            poll (bool, optional): False if changes of the file don't say anything about the
+                data, e.g. for a SQLite database shared by several stores. Defaults to True.
+
+        Returns:
+            WatchedFile: Handle to stop watching the file with unwatch."""
+
+        watched_file = WatchedFile(path, loader, on_change, poll)
+        self.watched.append(watched_file)
+
+        if load_now:
+            await self._reload(watched_file, await run_io(get_file_state, path))
+        else:
+            watched_file.state = await run_io(get_file_state, path)
+
+        logging.debug("Watching file %s.", path)
+        return watched_file
+
+    def unwatch(self, watched_file: WatchedFile) -> None:
+        with contextlib.suppress(ValueError):
+            self.watched.remove(watched_file)
+
+        logging.debug("Stopped watching file %s.", watched_file.path)
+
+    async def _reload(self, watched_file: WatchedFile, state: FileState) -> None:
+        watched_file.state = state
+
+        try:
+            data = await watched_file.loader()
+        except (OSError, ValueError):
+            logging.exception("Could not load file %s!", watched_file.path)
+            return
+
+        watched_file.on_change(data)
+        logging.info("Loaded file %s.", watched_file.path)
+
+    async def check(self) -> None:
+        """Reloads every watched file whose modification time or size changed."""
+
+        if not (watched := [watched_file for watched_file in self.watched if watched_file.poll]):
+            return
+
+        states = await run_io(lambda: [get_file_state(watched_file.path) for watched_file in watched])
+
+        for watched_file, state in zip(watched, states, strict=True):
+            if state != watched_file.state and watched_file in self.watched:
+                await self._reload(watched_file, state)
+
+    async def reload_all(self) -> None:
+        """Reloads every watched file, no matter if it changed."""
+
+        for watched_file in list(self.watched):
+            await self._reload(watched_file, await run_io(get_file_state, watched_file.path))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                await self.check()
+            except Exception:
+                logging.exception("File watcher failed!")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logging.info("File watcher started.")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logging.info("File watcher stopped.")